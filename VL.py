@@ -1,12 +1,20 @@
 #!/usr/bin/env python3
 
 import time
-import board
-import adafruit_vl53l0x
+from vl_sampler import VLSampler, FakeVL53L0X
 
-# Initialize I2C and VL53L0X sensor
-i2c = board.I2C()
-vl53 = adafruit_vl53l0x.VL53L0X(i2c)
+# Initialize I2C and VL53L0X sensor (a software one off the Pi)
+try:
+    import board
+    import adafruit_vl53l0x
+    vl53 = adafruit_vl53l0x.VL53L0X(board.I2C())
+except (ImportError, NotImplementedError, RuntimeError, ValueError):
+    vl53 = FakeVL53L0X()
+    print("MOCK MODE - no VL53L0X, using FakeVL53L0X")
+
+# Readings come from a background thread; this loop only displays them
+sampler = VLSampler(vl53)
+sampler.start()
 
 print("VL53L0X Distance Sensor")
 print("Reading distance... (Ctrl+C to exit)")
@@ -14,15 +22,16 @@ print("-" * 40)
 
 try:
     while True:
-        distance_mm = vl53.range
-        distance_cm = distance_mm / 10.0
-        
-        print(f"\rDistance: {distance_cm:6.1f} cm ({distance_mm:4.0f} mm)", end='', flush=True)
-        
+        sample = sampler.latest()
+        if sample is not None:
+            distance_cm = sample.median / 10.0
+            print(f"\rDistance: {distance_cm:6.1f} cm ({sample.median:4.0f} mm, raw {sample.mm:4d} mm, "
+                  f"{sampler.rate():4.1f} Hz)", end='', flush=True)
+
         time.sleep(0.1)
 
 except KeyboardInterrupt:
     print("\nStopping measurements...")
 finally:
+    sampler.stop()
     print("Sensor stopped.")
-
@@ -49,46 +49,54 @@ let state = {
 let laserTimer = null;
 let laserCountdownInterval = null;
 
+// Apply turret state from the backend to the UI
+function applyTurret(turretData) {
+  state.azimuth = turretData.azimuth;
+  state.altitude = turretData.altitude;
+  state.laserOn = turretData.laser;
+  
+  azimuthSlider.value = turretData.azimuth;
+  altitudeSlider.value = turretData.altitude;
+  azimuthVal.textContent = turretData.azimuth.toFixed(2) + ' rad';
+  altitudeVal.textContent = turretData.altitude.toFixed(2) + ' rad';
+  laserToggle.checked = turretData.laser;
+}
+
+// Apply field layout (our position, enemies, globes)
+function applyField(data) {
+  // Position our turret (update if position changed)
+  if (data.my_position) {
+    const posChanged = !turret.positioned || 
+                      Math.abs(turret.positionX - data.my_position.x) > 0.1 || 
+                      Math.abs(turret.positionZ - data.my_position.z) > 0.1;
+    
+    if (posChanged) {
+      turret.setPosition(data.my_position.x, data.my_position.z, data.my_position.angle_to_origin);
+      
+      // Update camera on position change
+      camera.position.set(data.my_position.x, 200, data.my_position.z + 400);
+      camera.lookAt(data.my_position.x, 0, data.my_position.z);
+      controls.target.set(data.my_position.x, 0, data.my_position.z);
+      
+      turret.positioned = true;
+    }
+  }
+  
+  // Update field visualization
+  if (data.enemies && data.globes) {
+    console.log(`Rendering ${data.enemies.length} enemies, ${data.globes.length} globes`);
+    field.update(data.enemies, data.globes);
+  }
+}
+
 // Sync all data with backend
 async function syncWithBackend() {
   try {
     const response = await fetch('/api/position');
     const data = await response.json();
     
-    // Update turret state
-    state.azimuth = data.turret.azimuth;
-    state.altitude = data.turret.altitude;
-    state.laserOn = data.turret.laser;
-    
-    azimuthSlider.value = data.turret.azimuth;
-    altitudeSlider.value = data.turret.altitude;
-    azimuthVal.textContent = data.turret.azimuth.toFixed(2) + ' rad';
-    altitudeVal.textContent = data.turret.altitude.toFixed(2) + ' rad';
-    laserToggle.checked = data.turret.laser;
-    
-    // Position our turret (update if position changed)
-    if (data.my_position) {
-      const posChanged = !turret.positioned || 
-                        Math.abs(turret.positionX - data.my_position.x) > 0.1 || 
-                        Math.abs(turret.positionZ - data.my_position.z) > 0.1;
-      
-      if (posChanged) {
-        turret.setPosition(data.my_position.x, data.my_position.z, data.my_position.angle_to_origin);
-        
-        // Update camera on position change
-        camera.position.set(data.my_position.x, 200, data.my_position.z + 400);
-        camera.lookAt(data.my_position.x, 0, data.my_position.z);
-        controls.target.set(data.my_position.x, 0, data.my_position.z);
-        
-        turret.positioned = true;
-      }
-    }
-    
-    // Update field visualization
-    if (data.enemies && data.globes) {
-      console.log(`Rendering ${data.enemies.length} enemies, ${data.globes.length} globes`);
-      field.update(data.enemies, data.globes);
-    }
+    applyTurret(data.turret);
+    applyField(data);
     
     return data;
   } catch (error) {
@@ -97,8 +105,40 @@ async function syncWithBackend() {
   }
 }
 
-// Frequent sync with backend for smooth display (every 100ms)
-setInterval(syncWithBackend, 100);
+// Backend pushes turret state when it changes and the field layout when
+// positions are refetched. Fall back to polling every 100ms if the
+// stream can't be opened at all.
+let pollTimer = null;
+
+function startPolling() {
+  if (!pollTimer) {
+    pollTimer = setInterval(syncWithBackend, 100);
+  }
+}
+
+if (window.EventSource) {
+  const stream = new EventSource('/api/stream');
+  let streamOpened = false;
+  
+  stream.addEventListener('open', () => {
+    streamOpened = true;
+    if (pollTimer) {
+      clearInterval(pollTimer);
+      pollTimer = null;
+    }
+  });
+  stream.addEventListener('turret', (e) => applyTurret(JSON.parse(e.data)));
+  stream.addEventListener('field', (e) => applyField(JSON.parse(e.data)));
+  stream.addEventListener('error', () => {
+    // EventSource reconnects by itself; only poll if it never worked
+    if (!streamOpened) {
+      stream.close();
+      startPolling();
+    }
+  });
+} else {
+  startPolling();
+}
 
 // Keyboard controls - send velocity commands
 const keysPressed = new Set();
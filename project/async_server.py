@@ -0,0 +1,182 @@
+# async_server.py
+#
+# Asyncio HTTP front end for the turret API.
+#
+# The stock http.server.HTTPServer handles one connection at a time, so a
+# single slow or stalled client (or the frontend's 100 ms position poll
+# piling up) holds up /api/stop-target.  Here every connection is its own
+# coroutine.  The route handlers themselves are the same ones TurretHandler
+# uses (main.route_request); since they touch GPIO and the motor queues they
+# are run in thread pools so the event loop never blocks on turret I/O.
+# Commands (POST) get a pool of their own, so a flood of position polls can
+# never queue up in front of /api/stop-target.
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import urlparse
+
+IDLE_TIMEOUT = 10.0       # drop keep-alive connections idle this long [s]
+HEADER_TIMEOUT = 5.0      # a client has this long to finish sending its body [s]
+MAX_BODY = 1 << 20        # refuse request bodies larger than 1 MB
+STREAM_BACKLOG = 64       # frames a stream client may fall behind before it is dropped
+
+
+class AsyncTurretServer:
+    """
+    Minimal HTTP/1.1 server on asyncio.
+
+    route(method, path, headers, body) must return a (status, headers, body)
+    tuple; headers passed to it are a dict with lowercase keys.
+    streams maps GET paths to StateBroadcaster-like objects
+    (subscribe(deliver)/unsubscribe(token)) served as Server-Sent Events.
+    serve_forever()/shutdown() mirror http.server so run_server() can
+    treat both server types the same way.
+    """
+
+    def __init__(self, route, host, port, workers=4, streams=None):
+        self.route = route
+        self.streams = streams or {}
+        self.host = host
+        self.port = port
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api')
+        self.control_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='api-control')
+        self.loop = None
+        self._server = None
+        self._stopped = None
+        self._connections = set()
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # Report the real port when bound to port 0 (used by the benchmarks)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def _serve(self, ready=None):
+        await self.start()
+        if ready is not None:
+            ready.set()
+        async with self._server:
+            await self._stopped.wait()
+            self._server.close()
+            for task in list(self._connections):
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+        self.executor.shutdown(wait=False)
+        self.control_executor.shutdown(wait=False)
+
+    def serve_forever(self, ready=None):
+        """Run the event loop until shutdown() is called (blocking)"""
+        asyncio.run(self._serve(ready))
+
+    def shutdown(self):
+        """Stop serving; safe to call from any thread or a signal handler"""
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._stopped.set)
+
+    async def _read_request(self, reader):
+        """Read one request; returns None when the client closes the connection"""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), IDLE_TIMEOUT)
+        except asyncio.IncompleteReadError as e:
+            if not e.partial.strip():
+                return None     # clean close between requests
+            raise
+        except asyncio.LimitOverrunError:
+            raise ValueError('request head too large')
+        request_line, *header_lines = head.decode('latin-1').split('\r\n')
+        method, target, version = request_line.split()
+
+        headers = {}
+        for line in header_lines:
+            if line:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length', 0) or 0)
+        if length > MAX_BODY:
+            raise ValueError('request body too large')
+        body = await asyncio.wait_for(reader.readexactly(length), HEADER_TIMEOUT) if length else b''
+        return method, target, version, headers, body
+
+    def _write_response(self, writer, status, headers, body, keep_alive):
+        lines = [f'HTTP/1.1 {status} {HTTPStatus(status).phrase}',
+                 'Access-Control-Allow-Origin: *',
+                 f'Content-Length: {len(body)}',
+                 'Connection: ' + ('keep-alive' if keep_alive else 'close')]
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+
+    async def _stream(self, writer, broadcaster):
+        """Server-Sent Events: forward broadcaster frames until the client goes away"""
+        writer.write(b'HTTP/1.1 200 OK\r\n'
+                     b'Content-Type: text/event-stream\r\n'
+                     b'Cache-Control: no-cache\r\n'
+                     b'Access-Control-Allow-Origin: *\r\n'
+                     b'Connection: close\r\n\r\n')
+        frames = asyncio.Queue()
+
+        def offer(frame):
+            # Runs on the event loop; a long backlog means the client is too
+            # far behind, so hang up and let EventSource reconnect
+            if frames.qsize() >= STREAM_BACKLOG:
+                frame = None
+            frames.put_nowait(frame)
+
+        def deliver(frame):
+            # Called from the broadcaster thread
+            self.loop.call_soon_threadsafe(offer, frame)
+
+        token = broadcaster.subscribe(deliver)
+        try:
+            while True:
+                frame = await frames.get()
+                if frame is None:
+                    break
+                writer.write(frame)
+                await writer.drain()
+        finally:
+            broadcaster.unsubscribe(token)
+
+    async def _handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except ValueError:
+                    self._write_response(writer, 400, {'Content-Type': 'application/json'},
+                                         json.dumps({'error': 'Bad request'}).encode(), False)
+                    break
+                if request is None:
+                    break
+                method, target, version, headers, body = request
+
+                stream = self.streams.get(urlparse(target).path) if method == 'GET' else None
+                if stream is not None:
+                    await self._stream(writer, stream)
+                    break
+
+                executor = self.control_executor if method == 'POST' else self.executor
+                try:
+                    status, resp_headers, payload = await self.loop.run_in_executor(
+                        executor, self.route, method, target, headers, body)
+                except Exception as e:
+                    print(f"Error handling {method} {target}: {e}")
+                    status, resp_headers = 500, {'Content-Type': 'application/json'}
+                    payload = json.dumps({'error': 'Internal error'}).encode()
+
+                keep_alive = (version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close')
+                self._write_response(writer, status, resp_headers, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
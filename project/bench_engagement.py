@@ -0,0 +1,66 @@
+"""
+Benchmark: auto-target sequence, step by step vs the engagement timeline.
+
+Runs the targets of positions.json through the real TurretState (mock GPIO
+off the Pi, so the motors really step) twice, in the same planned order:
+
+  sequential - the old loop: move_to_position, sleep settle, fire, sleep
+               settle again
+  timeline   - engagement.Engagement: settle measured from the motors'
+               completion signal, next slew queued as the laser turns off
+
+Settle/fire default to a fraction of the real 0.5 s / 3.0 s so a run is
+quick; the saving per target does not depend on them.  Prints the
+timeline's per-target report and both totals.
+
+    python3 bench_engagement.py [--targets 8] [--settle 0.1] [--fire 0.3]
+"""
+import argparse
+import threading
+import time
+
+import main
+from command import loadAims
+from engagement import Engagement, Timeline
+from planner import plan_order
+
+
+def sequential(turret, aims, order, settle, fire):
+    for i in order:
+        turret.move_to_position(*aims[i])
+        time.sleep(settle)
+        turret.set_laser(True)
+        time.sleep(fire)
+        turret.set_laser(False)
+        time.sleep(settle)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='engagement timeline benchmark')
+    parser.add_argument('--targets', type=int, default=8)
+    parser.add_argument('--settle', type=float, default=0.1, help='settle window [s]')
+    parser.add_argument('--fire', type=float, default=0.3, help='laser on [s]')
+    args = parser.parse_args()
+
+    aims = loadAims(main.position_data, main.TEAM_NUMBER)[:args.targets]
+    turret = main.bring_up()
+    order, slew = plan_order((0.0, 0.0), aims, profile=main.MOTION_PROFILE)
+
+    t = time.perf_counter()
+    sequential(turret, aims, order, args.settle, args.fire)
+    old = time.perf_counter() - t
+    turret.move_to_position(0.0, 0.0)
+
+    engagement = Engagement(Timeline(settle=args.settle, fire=args.fire), turret.start_move,
+                            turret.set_laser, turret.motors_off, threading.Event())
+    t = time.perf_counter()
+    engagement.run(aims, order)
+    new = time.perf_counter() - t
+    turret.motors_off()
+
+    print(engagement.report())
+    print(f"\n{len(order)} targets, settle {args.settle} s, fire {args.fire} s "
+          f"(planned slewing {slew:.2f} s)")
+    print(f"sequential {old:.2f} s, timeline {new:.2f} s: saved {old - new:.2f} s "
+          f"({(old - new) / len(order):.2f} s per target)")
+    turret.shutdown()
@@ -0,0 +1,108 @@
+"""
+Benchmark: emergency stop latency, measured at the (mock) pins.
+
+Sets up two motors on an OutputWriter as TurretState does, starts a 180
+degree move on both, and calls Stepper.abort() on both at a random point.
+The recording mock_gpio trace then gives, relative to the abort call:
+
+  last step  - the last coil change latched on either motor
+  coils off  - the first frame with every coil off
+  returned   - when both abort handles reported the workers stopped
+
+Each trial also replays the latched coil patterns and checks that the
+motors' position counters match the steps that actually reached the pins.
+
+    python3 bench_estop.py [--trials 20] [--cruise 600]
+"""
+import argparse
+import multiprocessing
+import random
+import statistics
+import time
+
+import shifter
+from output import OutputWriter
+from profiles import Profile
+from shifter import Shifter
+from stepper_class_shiftregister_multiprocessing import Stepper
+
+DATA, LATCH, CLOCK = 16, 20, 21
+
+
+def pin_steps(frames, slot):
+    """Net steps of one motor from its latched coil patterns"""
+    index = {pattern: i for i, pattern in enumerate(Stepper.seq)}
+    steps, last = 0, None
+    for t, word in frames:
+        phase = index.get((word >> (4 * slot)) & 0b1111)
+        if phase is None:
+            continue            # coils off
+        if last is not None:
+            d = (phase - last) % 8
+            steps += 1 if d == 1 else -1 if d == 7 else 0
+        last = phase
+    return steps
+
+
+def trial(motors, writer):
+    gpio = shifter.GPIO
+    gpio.clear()
+    # Start the trace with the coil patterns the motors are resting on
+    writer.s.invalidate()
+    writer.sync()
+    before = [m.steps() for m in motors]
+    for m in motors:
+        m.rotate(180)
+    time.sleep(random.uniform(0.15, 0.4))
+
+    t_abort = time.perf_counter_ns()
+    stops = [m.abort() for m in motors]
+    for stop in stops:
+        stop.wait(2.0)
+    t_return = time.perf_counter_ns()
+    writer.sync()
+
+    frames = gpio.frames(DATA, CLOCK, LATCH)
+    after = [f for f in frames if f[0] >= t_abort]
+    changes = [t for (t, w), (_, prev) in zip(frames[1:], frames) if t >= t_abort and w and w != prev]
+    last_step = (max(changes) - t_abort) / 1e6 if changes else 0.0
+    off = next((t for t, w in after if w == 0), None)
+    coils_off = (off - t_abort) / 1e6 if off is not None else float('nan')
+
+    exact = True
+    for slot, m in enumerate(motors):
+        moved = m.steps() - before[slot]
+        exact &= moved == pin_steps(frames, slot)
+        m.goAngle(0).wait()             # back to the start for the next trial
+    return last_step, coils_off, (t_return - t_abort) / 1e6, exact, gpio.dropped()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='emergency stop latency benchmark')
+    parser.add_argument('--trials', type=int, default=20)
+    parser.add_argument('--cruise', type=float, default=600, help='cruise step delay [us]')
+    args = parser.parse_args()
+    if shifter.GPIO.__name__ != 'mock_gpio':
+        raise SystemExit("needs the recording mock_gpio (run off the Pi)")
+
+    profile = Profile.trapezoid(Stepper.delay, args.cruise, 4000)
+    s = Shifter(data=DATA, latch=LATCH, clock=CLOCK)
+    writer = OutputWriter(s, n_slots=2)
+    motors = [Stepper(s, multiprocessing.Lock(), profile, writer) for _ in range(2)]
+
+    for m in motors:                    # energize the coils so every trial starts on a known phase
+        m.rotate(1).wait()
+        m.goAngle(0).wait()
+    results = [trial(motors, writer) for _ in range(args.trials)]
+    print(f"{args.trials} trials, step period {Stepper.delay:.0f}-{args.cruise:.0f} us")
+    print("after abort()  | p50 [ms] | max [ms]")
+    print("-" * 38)
+    for i, name in enumerate(('last step', 'coils off', 'returned')):
+        values = [r[i] for r in results]
+        print(f"{name:14s} | {statistics.median(values):8.2f} | {max(values):8.2f}")
+    print(f"position counters exact in {sum(r[3] for r in results)}/{args.trials} trials"
+          + (f" ({sum(r[4] > 0 for r in results)} trials overflowed the trace)" if any(r[4] for r in results) else ""))
+
+    for m in motors:
+        m.worker.terminate()
+    writer.stop()
@@ -0,0 +1,68 @@
+"""
+Benchmark: scalar getFiringAngles loop vs getFiringAnglesBatch (NumPy).
+
+Scales the field from positions.json up to thousands of random targets
+(globes and turrets on the same rings) and times:
+
+  one shooter - our turret against every target, as auto_target_sequence
+                does: list comprehension vs one batch call
+  all pairs   - every turret on the field against every target
+
+and checks the batch results against the scalar ones.
+
+    python3 bench_firing.py [--targets 24 1000 10000] [--shooters 20]
+"""
+import argparse
+import math
+import random
+import time
+
+from command import loadTargets, getFiringAngles, getFiringAnglesBatch
+
+
+def best(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t)
+    return min(times), result
+
+
+def field(real, n, rng):
+    """n targets like the real ones: random angle, radius and height of a real one"""
+    return [[r, rng.uniform(0, 2 * math.pi), z] for r, _, z in (rng.choice(real) for _ in range(n))]
+
+
+def max_error(scalar, azimuth, altitude):
+    # Azimuths are compared round the circle (+-pi is the same direction)
+    error = 0.0
+    for (az, alt), baz, balt in zip(scalar, azimuth, altitude):
+        error = max(error, abs((az - baz + math.pi) % (2 * math.pi) - math.pi), abs(alt - balt))
+    return error
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='firing solution benchmark')
+    parser.add_argument('--targets', type=int, nargs='+', default=[24, 1000, 10000])
+    parser.add_argument('--shooters', type=int, default=20)
+    args = parser.parse_args()
+
+    me, real = loadTargets()
+    rng = random.Random(1)
+    shooters = [[r, rng.uniform(0, 2 * math.pi)] for r, _, _ in field(real, args.shooters, rng)]
+
+    print("case                    | targets | scalar [ms] | batch [ms] | speedup | max error [rad]")
+    print("-" * 89)
+    for n in args.targets:
+        targets = field(real, n, rng)
+        t_scalar, scalar = best(lambda: [getFiringAngles(me, t) for t in targets])
+        t_batch, (az, alt) = best(lambda: getFiringAnglesBatch(me, targets))
+        print(f"one shooter             | {n:7d} | {1e3 * t_scalar:11.2f} | {1e3 * t_batch:10.2f} | "
+              f"{t_scalar / t_batch:6.1f}x | {max_error(scalar, az, alt):.1e}")
+
+        t_scalar, scalar = best(lambda: [getFiringAngles(s, t) for s in shooters for t in targets], 1)
+        t_batch, (az, alt) = best(lambda: getFiringAnglesBatch(shooters, targets, all_pairs=True), 3)
+        print(f"all pairs ({args.shooters:3d} turrets) | {n:7d} | {1e3 * t_scalar:11.2f} | "
+              f"{1e3 * t_batch:10.2f} | {t_scalar / t_batch:6.1f}x | "
+              f"{max_error(scalar, az.ravel(), alt.ravel()):.1e}")
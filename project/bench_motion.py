@@ -0,0 +1,73 @@
+"""
+Benchmark: independent axis moves vs coordinated TurretState.start_move.
+
+Both make the same two-axis moves on the real TurretState (mock GPIO off
+the Pi, MOTION_PROFILE on both motors):
+
+  independent - one goAngle() per motor, as start_move used to queue them:
+                each axis runs its own profile and the shorter one arrives
+                first
+  coordinated - start_move(): both start at the same deadline and the
+                shorter axis' steps are spread over the longer one's
+
+For each one this prints the wall time, the combined step rate, the number
+of shift-register frames latched, and how far apart the two axes finished.
+
+    python3 bench_motion.py [--az 90] [--alt 30] [--repeats 3]
+"""
+import argparse
+import math
+import time
+
+import main
+
+
+def finish_times(moves, t0):
+    """Poll handles and record when each one completed"""
+    finished = [None] * len(moves)
+    while None in finished:
+        for i, move in enumerate(moves):
+            if finished[i] is None and move.done():
+                finished[i] = time.perf_counter() - t0
+        time.sleep(0.0005)
+    return finished
+
+
+def independent(turret, azimuth, altitude):
+    return [turret.azimuth_motor.goAngle(-math.degrees(azimuth)),
+            turret.altitude_motor.goAngle(math.degrees(altitude))]
+
+
+def run(turret, start, az, alt, repeats):
+    motors = (turret.azimuth_motor, turret.altitude_motor)
+    steps0 = sum(m.step_count.value for m in motors)
+    frames0 = turret.shifter.frames.value
+    total = spread = 0.0
+    for i in range(repeats):
+        target = (math.radians(az), math.radians(alt)) if i % 2 == 0 else (0.0, 0.0)
+        t0 = time.perf_counter()
+        finished = finish_times(start(turret, *target), t0)
+        total += max(finished)
+        spread += abs(finished[0] - finished[1])
+    turret.move_to_position(0.0, 0.0)       # (the odd repeat counts end away from 0)
+    steps = sum(m.step_count.value for m in motors) - steps0
+    return total, steps, turret.shifter.frames.value - frames0, spread / repeats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='independent vs coordinated two-axis moves')
+    parser.add_argument('--az', type=float, default=90.0, help='azimuth move [deg]')
+    parser.add_argument('--alt', type=float, default=30.0, help='altitude move [deg]')
+    parser.add_argument('--repeats', type=int, default=4)
+    args = parser.parse_args()
+
+    turret = main.bring_up()
+    print(f"{args.repeats} x move az {args.az} deg / alt {args.alt} deg, {main.MOTION_PROFILE}")
+    print("design       | time [s] | steps/s | frames | frames/step | finish spread [ms]")
+    print("-" * 80)
+    for name, start in (('independent', independent),
+                        ('coordinated', lambda t, az, alt: t.start_move(az, alt))):
+        elapsed, steps, frames, spread = run(turret, start, args.az, args.alt, args.repeats)
+        print(f"{name:12s} | {elapsed:8.2f} | {steps / elapsed:7.0f} | {frames:6d} | "
+              f"{frames / steps:11.2f} | {spread * 1000:8.1f}")
+    turret.shutdown()
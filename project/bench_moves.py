@@ -0,0 +1,69 @@
+"""
+Benchmark: completion-signalled moves vs the old sleep-based wait estimate.
+
+Drives the turret through every target in positions.json (mock GPIO off the
+Pi, so the steppers really step) and times each move_to_position() call, which now returns when the worker processes
+report the move finished.  For comparison it prints what the old code slept
+for the same move: 0.1 s settle + steps * 1.2 ms + 0.3 s buffer + 0.05 s
+before motors off.  The motors run the constant Stepper.delay profile the
+old estimate assumed, not main.MOTION_PROFILE, so the saving is only the
+completion signalling (bench_profiles.py covers the faster profile).
+
+Laser/settle time is left out - only the time spent moving is compared.
+A negative "old - real" means the old estimate was too short and the old
+code would have fired before the turret got there; positive is dead time.
+
+    python3 bench_moves.py [--targets N]
+"""
+import argparse
+import math
+import time
+
+import main
+from command import loadTargets, getFiringAngles
+from profiles import Profile
+from stepper_class_shiftregister_multiprocessing import Stepper
+
+
+def old_wait_time(delta_az, delta_alt):
+    """What the sleep-based move_to_position waited for this move [s]"""
+    max_steps = max(abs(math.degrees(delta_az)), abs(math.degrees(delta_alt))) * Stepper.steps_per_degree
+    return 0.1 + max_steps * 0.0012 + 0.3 + 0.05
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='completion-signalled move benchmark')
+    parser.add_argument('--targets', type=int, default=None, help='only use the first N targets')
+    args = parser.parse_args()
+
+    my_pos, targets = loadTargets(main.position_data, main.TEAM_NUMBER)
+    if args.targets:
+        targets = targets[:args.targets]
+
+    main.MOTION_PROFILE = Profile.constant(Stepper.delay)     # what the old wait assumed
+    turret = main.bring_up()
+    old_total = new_total = 0.0
+    early = 0
+    print(" # | steps | old wait [s] | signalled [s] | old - real [s]")
+    print("-" * 61)
+    for i, target in enumerate(targets):
+        azimuth, altitude = getFiringAngles(my_pos, target)
+        pos = turret.get_position()
+        old = old_wait_time(azimuth - pos['azimuth'], altitude - pos['altitude'])
+        steps = int(max(abs(math.degrees(azimuth - pos['azimuth'])),
+                        abs(math.degrees(altitude - pos['altitude']))) * Stepper.steps_per_degree)
+
+        t0 = time.perf_counter()
+        turret.move_to_position(azimuth, altitude)
+        new = time.perf_counter() - t0
+
+        old_total += old
+        new_total += new
+        early += old < new
+        print(f"{i+1:2d} | {steps:5d} | {old:12.3f} | {new:13.3f} | {old - new:+14.3f}")
+
+    print("-" * 61)
+    print(f"{len(targets)} targets: old {old_total:.2f} s, signalled {new_total:.2f} s, "
+          f"saved {old_total - new_total:.2f} s ({100 * (1 - new_total / old_total):.0f}%)")
+    print(f"old estimate was too short (turret still moving) on {early}/{len(targets)} moves")
+    turret.shutdown()
@@ -0,0 +1,95 @@
+"""
+Benchmark: shared-lock output vs a single-owner OutputWriter.
+
+N motor processes step together on a chained register (N/2 bytes) with
+deadline pacing at a given step delay:
+
+  shared lock - the old Stepper path: lock shifter_outputs, read-modify-
+                write, shift the whole frame, unlock - on every step
+  writer      - each motor puts its coil pattern in its own slot and one
+                OutputWriter process latches a frame whenever a slot changes
+
+For each motor count and delay this prints the combined step rate reached
+and how much longer than planned the run took (drift).  The last column is
+how often a writer-side motor had to wait for its previous pattern to be
+latched.  Off the Pi this runs against mock_gpio.
+
+    python3 bench_output.py [--motors 2 4 8] [--delays 1200 800 600 400] [--time 0.25]
+"""
+import argparse
+import multiprocessing
+import time
+
+from output import OutputWriter
+from shifter import Shifter
+from stepper_class_shiftregister_multiprocessing import Stepper
+from timing import wait_until
+
+
+def shared_motor(i, nbits, steps, delay, shifter, outputs, start):
+    shift = 4 * i
+    keep = ~(0b1111 << shift)
+    due = start
+    for k in range(steps):
+        wait_until(due)
+        with outputs.get_lock():
+            new_output = (outputs.value & keep) | (Stepper.seq[k % 8] << shift)
+            outputs.value = new_output
+            shifter.shiftWord(new_output, nbits)
+        due += delay / 1e6
+
+
+def writer_motor(slot, steps, delay, writer, start):
+    due = start
+    for k in range(steps):
+        wait_until(due)
+        writer.put(slot, Stepper.seq[k % 8])
+        due += delay / 1e6
+
+
+def run(n, delay, duration, use_writer):
+    s = Shifter(data=16, latch=20, clock=21)
+    nbits = 8 * ((4 * n + 7) // 8)
+    steps = int(duration * 1e6 / delay)
+    start = time.perf_counter() + 0.2       # let every process get going first
+    if use_writer:
+        writer = OutputWriter(s, n_slots=n)
+        procs = [multiprocessing.Process(target=writer_motor,
+                                         args=(writer.attach(), steps, delay, writer, start))
+                 for _ in range(n)]
+    else:
+        outputs = multiprocessing.Value('q', 0)
+        procs = [multiprocessing.Process(target=shared_motor,
+                                         args=(i, nbits, steps, delay, s, outputs, start))
+                 for i in range(n)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - start
+    stalls = 0
+    if use_writer:
+        writer.sync()
+        stalls = sum(writer.stalls)
+        writer.stop()
+    planned = steps * delay / 1e6
+    return n * steps / elapsed, 100 * (elapsed / planned - 1), stalls / (n * steps)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='shift register output owner benchmark')
+    parser.add_argument('--motors', type=int, nargs='+', default=[2, 4, 8])
+    parser.add_argument('--delays', type=float, nargs='+', default=[1200, 800, 600, 400])
+    parser.add_argument('--time', type=float, default=0.25, help='planned run time [s]')
+    args = parser.parse_args()
+
+    print(f"{multiprocessing.cpu_count()} CPU(s)")
+    print("motors | delay [us] | planned [steps/s] | shared lock [steps/s] (drift) | writer [steps/s] (drift) | stalls")
+    print("-" * 108)
+    for n in args.motors:
+        for delay in args.delays:
+            planned = n * 1e6 / delay
+            shared_rate, shared_drift, _ = run(n, delay, args.time, False)
+            writer_rate, writer_drift, stalls = run(n, delay, args.time, True)
+            print(f"{n:6d} | {delay:10.0f} | {planned:17.0f} | {shared_rate:12.0f} ({shared_drift:+6.1f}%)     | "
+                  f"{writer_rate:9.0f} ({writer_drift:+6.1f}%)  | {100 * stalls:5.1f}%")
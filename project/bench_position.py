@@ -0,0 +1,113 @@
+"""
+Benchmark: integer step counter vs the old float angle.
+
+  per-step cost - what each step did to track position: the old locked
+                  float add + % 360 on a shared Value('d'), vs one add on
+                  the shared step counter
+  drift         - runs the turret (real TurretState, mock GPIO) through
+                  --moves random absolute moves and jogs, then back to 0,
+                  replaying every step on the old float model as well.
+                  The step counter has to land on exactly 0 steps; the
+                  float angle's rounding error is printed for comparison.
+
+    python3 bench_position.py [--moves 40] [--steps 200000]
+"""
+import argparse
+import multiprocessing
+import random
+import threading
+import time
+
+import main
+from stepper_class_shiftregister_multiprocessing import Stepper
+
+
+def per_step_cost(n):
+    angle = multiprocessing.Value('d', 0.0)
+    inc = 1 / Stepper.steps_per_degree
+    t = time.perf_counter()
+    for _ in range(n):
+        with angle.get_lock():
+            angle.value = (angle.value + inc) % 360
+    old = (time.perf_counter() - t) / n
+
+    counter = multiprocessing.RawValue('l', 0)
+    t = time.perf_counter()
+    for _ in range(n):
+        counter.value += 1
+    new = (time.perf_counter() - t) / n
+    return old, new
+
+
+class FloatModel:
+    """The old model, fed every step from a motor's telemetry ring"""
+
+    def __init__(self, ring):
+        self.ring = ring
+        self.cursor = ring.written()
+        self.last = None
+        self.angle = 0.0
+        self.inc = 1 / Stepper.steps_per_degree
+
+    def poll(self):
+        records, self.cursor = self.ring.read(self.cursor)
+        for _, steps, _ in records:
+            if self.last is not None:
+                self.angle = (self.angle + (steps - self.last) * self.inc) % 360
+            self.last = steps
+
+    def position(self):
+        return self.angle - 360 if self.angle > 180 else self.angle
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='position model benchmark')
+    parser.add_argument('--moves', type=int, default=40)
+    parser.add_argument('--steps', type=int, default=200000, help='steps for the per-step cost')
+    args = parser.parse_args()
+
+    old, new = per_step_cost(args.steps)
+    print(f"per-step position update: float+lock {old * 1e6:.2f} us, counter {new * 1e6:.2f} us "
+          f"({old / new:.1f}x)")
+
+    turret = main.bring_up()
+    rng = random.Random(1)
+    motors = {'azimuth': turret.azimuth_motor, 'altitude': turret.altitude_motor}
+    models = {name: FloatModel(m.telemetry) for name, m in motors.items()}
+    # The rings only hold 4096 steps: follow them while the motors run
+    # (the first step of each motor only sets the model's reference)
+    done = threading.Event()
+    def follow():
+        while not done.wait(0.02):
+            for model in models.values():
+                model.poll()
+    follower = threading.Thread(target=follow, daemon=True)
+    follower.start()
+    for m in motors.values():
+        m.rotate(1 / Stepper.steps_per_degree).wait()      # one step: the models' reference
+    time.sleep(0.05)
+    for m in motors.values():
+        m.zero()
+    for model in models.values():
+        model.angle = 0.0
+
+    for i in range(args.moves):
+        if i % 4 == 3:                       # a short jog now and then
+            turret.set_velocity(rng.uniform(-1, 1), rng.uniform(-1, 1))
+            time.sleep(0.1)
+            turret.set_velocity(0, 0)
+            time.sleep(0.1)
+        else:
+            turret.move_to_position(rng.uniform(-1.0, 1.0), rng.uniform(-0.5, 0.5))
+    turret.move_to_position(0.0, 0.0)
+    done.set()
+    follower.join()
+    for model in models.values():
+        model.poll()
+
+    print(f"\n{args.moves} moves/jogs and back to 0:")
+    for name, m in motors.items():
+        replay = models[name].position()
+        print(f"  {name:8s}: counter {m.steps():+d} steps ({m.position():+.4f} deg), "
+              f"{m.step_count.value} steps taken; float model {replay:+.3e} deg")
+    turret.shutdown()
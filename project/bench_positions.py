@@ -0,0 +1,143 @@
+"""
+Benchmark: fetching positions.json, one-shot vs PositionClient.
+
+Serves frontend/public/positions.json from a local stand-in for the field
+server (HTTP/1.1 keep-alive, ETag / Last-Modified, 304 for conditional
+requests).  Network cost is simulated with a delay per new connection
+(--connect) and per request (--rtt).  Compares:
+
+  fetchJson        - requests.get, a new connection every time
+  PositionClient   - pooled session + conditional GET
+  engagement start - how long auto_target_sequence waits for its data:
+                     fetchJson vs a warm PositionClient.get()
+
+and checks the client picks up a change to the file.
+
+    python3 bench_positions.py [--requests 50] [--connect 30] [--rtt 10]
+"""
+import argparse
+import email.utils
+import hashlib
+import json
+import statistics
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import command
+from command import PositionClient, fetchJson
+
+
+class FieldServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, data, connect, rtt):
+        super().__init__(('127.0.0.1', 0), FieldHandler)
+        self.connect, self.rtt = connect, rtt
+        self.connections = self.full = self.not_modified = 0
+        self.last_headers = None        # of the last request
+        self.set_data(data)
+
+    def set_data(self, data):
+        self.body = json.dumps(data).encode()
+        self.etag = '"%s"' % hashlib.sha1(self.body).hexdigest()[:16]
+        self.modified = email.utils.formatdate(time.time(), usegmt=True)
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/positions.json'
+
+
+class FieldHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'           # keep-alive
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+        time.sleep(self.server.connect)     # connection setup on the field network
+
+    def do_GET(self):
+        server = self.server
+        server.last_headers = self.headers
+        time.sleep(server.rtt)
+        # If-None-Match wins when both are sent (Last-Modified only has
+        # one-second resolution)
+        tag = self.headers.get('If-None-Match')
+        if (tag == server.etag if tag is not None
+                else self.headers.get('If-Modified-Since') == server.modified):
+            server.not_modified += 1
+            self.send_response(304)
+            self.send_header('ETag', server.etag)
+            self.end_headers()
+            return
+        server.full += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(server.body)))
+        self.send_header('ETag', server.etag)
+        self.send_header('Last-Modified', server.modified)
+        self.end_headers()
+        self.wfile.write(server.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def timed(fn, n):
+    times = []
+    for _ in range(n):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return times
+
+
+def report(name, server, times):
+    print(f"{name:16s} | {1e3 * statistics.mean(times):9.1f} | {1e3 * max(times):8.1f} | "
+          f"{server.connections:11d} | {server.full:4d} | {server.not_modified:4d}")
+    server.connections = server.full = server.not_modified = 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='position data client benchmark')
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--connect', type=float, default=30, help='connection setup [ms]')
+    parser.add_argument('--rtt', type=float, default=10, help='request round trip [ms]')
+    args = parser.parse_args()
+
+    with open(command.FALLBACK_PATH) as f:
+        data = json.load(f)
+    server = FieldServer(data, args.connect / 1e3, args.rtt / 1e3)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print(f"{args.requests} requests, {args.connect:.0f} ms per connection, {args.rtt:.0f} ms per request")
+    print("                 | mean [ms] | max [ms] | connections |  200 |  304")
+    print("-" * 72)
+    report('fetchJson', server, timed(lambda: fetchJson(server.url), args.requests))
+    client = PositionClient(server.url)
+    report('PositionClient', server, timed(client.refresh, args.requests))
+
+    # Engagement start: the data auto_target_sequence works from
+    cold = timed(lambda: fetchJson(server.url), 5)
+    warm = timed(lambda: client.get(max_age=0), 5)      # max_age=0: revalidates every time
+    time.sleep(0.2)
+    print(f"\nengagement start: fetchJson {1e3 * statistics.mean(cold):.1f} ms, "
+          f"PositionClient.get() {1e3 * statistics.mean(warm):.3f} ms (stale-while-revalidate)")
+
+    # A change on the server reaches on_update through the background refresh
+    updates = []
+    client = PositionClient(server.url, interval=0.05, on_update=updates.append)
+    client.start()
+    time.sleep(0.3)
+    changed = dict(data, version='bench')
+    server.set_data(changed)
+    t = time.perf_counter()
+    while not updates or updates[-1] != changed:
+        if time.perf_counter() - t > 2:
+            raise SystemExit("background refresh never saw the change")
+        time.sleep(0.005)
+    print(f"background refresh: change seen after {1e3 * (time.perf_counter() - t):.0f} ms "
+          f"(interval {1e3 * client.interval:.0f} ms), {client.not_modified}/{client.requests} "
+          f"requests were 304s")
+    client.stop()
+    server.shutdown()
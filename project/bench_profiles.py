@@ -0,0 +1,75 @@
+"""
+Benchmark: constant-rate vs acceleration-limited step profiles.
+
+Plans the auto-target sequence for the targets in positions.json with each
+profile (the planner costs moves with the profile's timing) and prints the
+total time spent moving.  Only the longer axis of each move counts, since
+both axes move at once.
+
+With --run it also times one real move per profile on the (mock) shift
+register, to check the worker keeps up with the shorter cruise delays.
+
+    python3 bench_profiles.py [--cruise 600] [--accel 4000] [--run 90]
+"""
+import argparse
+import math
+import multiprocessing
+import time
+
+from command import loadAims
+from planner import plan_order
+from profiles import Profile
+from shifter import Shifter
+from stepper_class_shiftregister_multiprocessing import Stepper
+
+
+def move_steps(start, aims, order):
+    here = start
+    for i in order:
+        yield int(max(abs(math.degrees(aims[i][0] - here[0])),
+                      abs(math.degrees(aims[i][1] - here[1]))) * Stepper.steps_per_degree)
+        here = aims[i]
+
+
+def timed_move(profile, degrees):
+    s = Shifter(data=16, latch=20, clock=21)
+    motor = Stepper(s, multiprocessing.Lock(), profile)
+    t0 = time.perf_counter()
+    motor.rotate(degrees).wait()
+    elapsed = time.perf_counter() - t0
+    motor.worker.terminate()
+    return elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='step profile benchmark')
+    parser.add_argument('--start', type=float, default=Stepper.delay, help='start delay [us]')
+    parser.add_argument('--cruise', type=float, default=600, help='cruise delay [us]')
+    parser.add_argument('--accel', type=float, default=4000, help='acceleration [steps/s^2]')
+    parser.add_argument('--run', type=float, default=None, metavar='DEG',
+                        help='also time a real move of DEG degrees per profile')
+    args = parser.parse_args()
+
+    profiles = [Profile.constant(args.start),
+                Profile.trapezoid(args.start, args.cruise, args.accel),
+                Profile.scurve(args.start, args.cruise, args.accel)]
+    aims = loadAims()
+    start = (0.0, 0.0)
+
+    baseline = None
+    print(f"{len(aims)} targets, ramp {profiles[1].ramp_steps()} steps")
+    print("profile                                   | moving [s] | longest move [s] | vs constant")
+    print("-" * 92)
+    for p in profiles:
+        order, total = plan_order(start, aims, profile=p)
+        longest = max(p.duration(n) for n in move_steps(start, aims, order))
+        baseline = baseline or total
+        print(f"{repr(p):41s} | {total:10.2f} | {longest:16.3f} | {100 * (total / baseline - 1):+10.0f}%")
+
+    if args.run:
+        steps = int(args.run * Stepper.steps_per_degree)
+        print(f"\nreal {args.run} deg move ({steps} steps)")
+        print("profile                                   | expected [s] | measured [s]")
+        print("-" * 72)
+        for p in profiles:
+            print(f"{repr(p):41s} | {p.duration(steps):12.3f} | {timed_move(p, args.run):12.3f}")
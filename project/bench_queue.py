@@ -0,0 +1,65 @@
+"""
+Benchmark: Stepper command backlog under heavy jogging.
+
+Holds a "key" for --hold seconds, sending one 5 degree command every 20 ms
+(the manual-control loop rate), which is far more than the motor can step
+in that time.  Then the key is released and we time how long the motor
+keeps going.
+
+  rotate, queued    - relative moves, worker runs them one by one (old)
+  rotate, coalesced - relative moves, the worker merges whatever queued up
+                      (fewer commands, but the same distance still has to
+                      be covered)
+  goto, latest wins - absolute target 5 degrees ahead of the motor's real
+                      position; each new target replaces the queued ones
+
+    python3 bench_queue.py [--hold 1.0] [--chunk 5]
+"""
+import argparse
+import multiprocessing
+import time
+
+from shifter import Shifter
+from stepper_class_shiftregister_multiprocessing import Stepper
+
+
+def run(mode, hold, chunk):
+    Stepper.coalesce = mode != 'rotate, queued'
+    motor = Stepper(Shifter(data=16, latch=20, clock=21), multiprocessing.Lock())
+    sent = max_depth = 0
+    end = time.perf_counter() + hold
+    while time.perf_counter() < end:
+        if mode.startswith('goto'):
+            motor.goAngle(motor.position() + chunk)
+        else:
+            motor.rotate(chunk)
+        sent += 1
+        max_depth = max(max_depth, motor.queue_depth())
+        time.sleep(0.02)
+
+    released = time.perf_counter()
+    last, overshoot = motor.position(), 0.0
+    while not motor.wait_idle(0.01):       # unwrap the distance moved after release
+        here = motor.position()
+        overshoot += (here - last + 180) % 360 - 180
+        last = here
+    run_on = time.perf_counter() - released
+    overshoot += (motor.position() - last + 180) % 360 - 180
+    stats = motor.stats()
+    motor.worker.terminate()
+    return sent, stats['executed'], stats['coalesced'], max_depth, run_on, overshoot
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='command backlog benchmark')
+    parser.add_argument('--hold', type=float, default=1.0, help='key held for [s]')
+    parser.add_argument('--chunk', type=float, default=5.0, help='degrees per command')
+    args = parser.parse_args()
+
+    print(f"key held {args.hold} s, {args.chunk} deg every 20 ms")
+    print("mode               | sent | executed | coalesced | max depth | run-on [s] | past release [deg]")
+    print("-" * 96)
+    for mode in ('rotate, queued', 'rotate, coalesced', 'goto, latest wins'):
+        sent, executed, coalesced, depth, run_on, overshoot = run(mode, args.hold, args.chunk)
+        print(f"{mode:18s} | {sent:4d} | {executed:8d} | {coalesced:9d} | {depth:9d} | "
+              f"{run_on:10.2f} | {overshoot:18.1f}")
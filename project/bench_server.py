@@ -0,0 +1,147 @@
+"""
+Benchmark: /api/stop-target latency while the frontend-style pollers hammer
+/api/position.
+
+Starts `python3 main.py` (threaded server) and `python3 main.py --async` on
+a free port back to back (mock GPIO is used automatically off the Pi), waits
+for the turret to come up and prints p50/p99 latency of the stop command
+with N clients polling.
+
+    python3 bench_server.py [--clients 20] [--interval 0.1] [--samples 200] [--stall]
+
+--stall adds one client that connects and never sends a request, which
+used to be enough to freeze the single-threaded server.
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+TIMEOUT = 2.0   # per-request client timeout [s]
+
+
+def request(port, method, path, body=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=TIMEOUT)
+    try:
+        conn.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+        resp = conn.getresponse()
+        resp.read()
+        return resp.status
+    finally:
+        conn.close()
+
+
+def poller(port, stop, interval):
+    # Same cadence as the frontend's setInterval(syncWithBackend, 100)
+    while not stop.is_set():
+        try:
+            request(port, 'GET', '/api/position')
+        except OSError:
+            pass
+        stop.wait(interval)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(kind, timeout=30.0):
+    # The server gets a process of its own (main.py, which sets up its own
+    # turret) - measuring from inside the server process would mostly
+    # measure GIL hand-offs between the client and server threads
+    port = free_port()
+    env = dict(os.environ, TURRET_PORT=str(port))
+    cmd = [sys.executable, 'main.py'] + (['--async'] if kind == 'async' else [])
+    proc = subprocess.Popen(cmd, cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    end = time.perf_counter() + timeout
+    while True:
+        try:
+            if request(port, 'GET', '/api/position') == 200:    # 503 until the turret is up
+                return proc, port
+        except OSError:
+            pass
+        if time.perf_counter() > end or proc.poll() is not None:
+            stop_server(proc)
+            raise RuntimeError(f"{kind} server did not come up")
+        time.sleep(0.01)
+
+
+def stop_server(proc):
+    proc.send_signal(signal.SIGTERM)
+    try:
+        proc.wait(5)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def run(kind, clients, samples, stall, interval):
+    server, port = start_server(kind)
+    # Pollers run in their own processes so they don't compete with the
+    # server for the GIL and skew the numbers
+    stop = multiprocessing.Event()
+    pollers = [multiprocessing.Process(target=poller, args=(port, stop, interval), daemon=True) for _ in range(clients)]
+    for p in pollers:
+        p.start()
+
+    stalled = None
+    if stall:
+        stalled = socket.create_connection(('127.0.0.1', port))   # connect, send nothing
+    time.sleep(0.5)   # let the pollers get going
+
+    latencies = []
+    failures = 0
+    for _ in range(samples):
+        t0 = time.perf_counter()
+        try:
+            request(port, 'POST', '/api/stop-target', body='{}')
+            latencies.append(time.perf_counter() - t0)
+        except OSError:
+            failures += 1
+            if failures >= 5 and not latencies:
+                break   # server is wedged, no point waiting out every timeout
+        time.sleep(0.01)
+
+    stop.set()
+    for p in pollers:
+        p.join(TIMEOUT + 1)
+    if stalled is not None:
+        stalled.close()
+    stop_server(server)
+
+    if latencies:
+        print(f"{kind:>6} | {len(latencies):4d} ok {failures:3d} failed | "
+              f"p50 {percentile(latencies, 50)*1000:7.2f} ms | "
+              f"p99 {percentile(latencies, 99)*1000:7.2f} ms | "
+              f"max {max(latencies)*1000:7.2f} ms")
+    else:
+        print(f"{kind:>6} | no successful requests ({failures} timed out after {TIMEOUT}s)")
+    return latencies, failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=20)
+    parser.add_argument('--samples', type=int, default=200)
+    parser.add_argument('--interval', type=float, default=0.1, help='poll interval per client [s]')
+    parser.add_argument('--stall', action='store_true')
+    args = parser.parse_args()
+
+    print(f"/api/stop-target latency with {args.clients} clients polling /api/position"
+          + (" + 1 stalled client" if args.stall else ""))
+    print("-" * 70)
+    for kind in ('thread', 'async'):
+        run(kind, args.clients, args.samples, args.stall, args.interval)
@@ -0,0 +1,178 @@
+"""
+Benchmark: Shifter.shiftWord before and after the fast path.
+
+LegacyShifter below is the old implementation (three GPIO.output calls and
+a sleep(0) per bit, plus padding clocks).  Both are run against mock_gpio,
+so the numbers measure the Python overhead per frame and the number of
+GPIO calls, not real pin speed.
+
+  step frames  - a motor stepping: every frame differs from the last
+  repeats      - the same frame sent again (skipped by the new path)
+
+The SPIShifter column sends the frames to a pty stand-in (one os.write per
+frame, like one spidev transfer) and drains it in a thread.
+
+--check first drives a simulated 74HC595 chain with both GPIO versions and
+confirms they latch the same outputs, and that the SPI byte stream shifts
+the same bits in.
+
+    python3 bench_shifter.py [--frames 20000] [--check]
+"""
+import argparse
+import os
+import threading
+import time
+
+import mock_gpio
+import shifter
+from shifter import Shifter, SPIShifter
+from stepper_class_shiftregister_multiprocessing import Stepper
+
+
+class LegacyShifter(Shifter):
+    def ping(self, p):
+        shifter.GPIO.output(p, 1)
+        time.sleep(0)
+        shifter.GPIO.output(p, 0)
+
+    def shiftWord(self, dataword, num_bits):
+        for i in range((num_bits+1) % 8):
+            shifter.GPIO.output(self.dataPin, 0)
+            self.ping(self.clockPin)
+        for i in range(num_bits):
+            shifter.GPIO.output(self.dataPin, dataword & (1<<i))
+            self.ping(self.clockPin)
+        self.ping(self.latchPin)
+
+
+class SimulatedRegister:
+    """Pin-level model of a 16-bit 74HC595 chain, installed as GPIO.output"""
+
+    def __init__(self, data, clock, latch):
+        self.pins = {data: 0, clock: 0, latch: 0}
+        self.data, self.clock, self.latch = data, clock, latch
+        self.shift = 0
+        self.latched = 0
+        self.calls = 0
+
+    def output(self, pins, values):
+        self.calls += 1
+        if not isinstance(pins, list):
+            pins, values = [pins], [values]
+        for pin, value in zip(pins, values):
+            value = 1 if value else 0
+            rising = value and not self.pins[pin]
+            self.pins[pin] = value
+            if rising and pin == self.clock:
+                self.shift = ((self.shift << 1) | self.pins[self.data]) & 0xffff
+            elif rising and pin == self.latch:
+                self.latched = self.shift
+
+
+def open_pty():
+    """pty pair: (master fd to read frames from, slave path for SPIShifter)"""
+    master, slave = os.openpty()
+    path = os.ttyname(slave)
+    os.close(slave)
+    return master, path
+
+
+def read_spi_frames(master, frames):
+    """Shift the bytes SPIShifter wrote through a register model (SPI mode 0, MSB first)"""
+    latched = []
+    shift = 0
+    for word, nbits in frames:
+        nbytes = (nbits + 7) // 8
+        raw = b''
+        while len(raw) < nbytes:
+            raw += os.read(master, nbytes - len(raw))
+        for byte in raw:
+            for i in range(7, -1, -1):
+                shift = ((shift << 1) | ((byte >> i) & 1)) & 0xffff
+        latched.append(shift & ((1 << nbits) - 1))
+    return latched
+
+
+def check():
+    frames = [(b, 8) for b in range(256)] + [(w, 16) for w in range(0, 65536, 257)]
+    results = []
+    for cls in (LegacyShifter, Shifter):
+        sim = SimulatedRegister(16, 21, 20)
+        shifter.GPIO.output = sim.output
+        s = cls(data=16, clock=21, latch=20)
+        latched = []
+        for word, nbits in frames:
+            s.shiftWord(word, nbits)
+            latched.append(sim.latched & ((1 << nbits) - 1))
+        results.append(latched)
+    shifter.GPIO.output = mock_gpio.output
+    mismatches = sum(a != b for a, b in zip(*results))
+
+    master, path = open_pty()
+    spi = SPIShifter(device_path=path)
+    sent = []
+    reader = threading.Thread(target=lambda: sent.extend(read_spi_frames(master, frames)))
+    reader.start()
+    for word, nbits in frames:
+        spi.shiftWord(word, nbits)
+    reader.join()
+    spi.close()
+    os.close(master)
+    spi_mismatches = sum(a != b for a, b in zip(results[1], sent))
+    print(f"check: {len(frames)} frames, {mismatches} GPIO mismatches, {spi_mismatches} SPI mismatches")
+    return mismatches == 0 and spi_mismatches == 0
+
+
+def count_calls(s, frames):
+    sim = SimulatedRegister(s.dataPin, s.clockPin, s.latchPin)
+    shifter.GPIO.output = sim.output
+    for f in frames:
+        s.shiftByte(f)
+    shifter.GPIO.output = mock_gpio.output
+    return sim.calls / len(frames)
+
+
+def drain(master):
+    try:
+        while os.read(master, 65536):
+            pass
+    except OSError:
+        pass
+
+
+def frames_per_second(s, frames):
+    t0 = time.perf_counter()
+    for f in frames:
+        s.shiftByte(f)
+    return len(frames) / (time.perf_counter() - t0)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='shift register fast path benchmark')
+    parser.add_argument('--frames', type=int, default=20000)
+    parser.add_argument('--check', action='store_true')
+    args = parser.parse_args()
+
+    if args.check and not check():
+        raise SystemExit("fast path latches different outputs")
+
+    # Two motors stepping in turn, as Stepper.__step produces them
+    step_frames = [(Stepper.seq[i % 8] << 4) | Stepper.seq[(i // 2) % 8] for i in range(args.frames)]
+    repeat_frames = [step_frames[0]] * args.frames
+
+    master, path = open_pty()
+    threading.Thread(target=drain, args=(master,), daemon=True).start()
+    spi = SPIShifter(device_path=path)
+
+    print("frames       | legacy [fps] | fast [fps] | speedup | GPIO calls/frame | spi pty [fps]")
+    print("-" * 88)
+    for name, frames in (('step frames', step_frames), ('repeats', repeat_frames)):
+        legacy = frames_per_second(LegacyShifter(data=16, clock=21, latch=20), frames)
+        fast = frames_per_second(Shifter(data=16, clock=21, latch=20), frames)
+        calls = (count_calls(LegacyShifter(data=16, clock=21, latch=20), frames),
+                 count_calls(Shifter(data=16, clock=21, latch=20), frames))
+        spi.invalidate()
+        spi_fps = frames_per_second(spi, frames)
+        print(f"{name:12s} | {legacy:12.0f} | {fast:10.0f} | {fast / legacy:6.1f}x | "
+              f"{calls[0]:5.1f} -> {calls[1]:<8.1f} | {spi_fps:13.0f}")
+    spi.close()
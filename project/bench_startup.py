@@ -0,0 +1,82 @@
+"""
+Benchmark: server start-up, time to the first 200 from /api/position.
+
+Starts `python3 main.py` on a free port and polls /api/position every few
+milliseconds from the moment the process is launched:
+
+  hardware first - TURRET_DEFER_HARDWARE=0: GPIO and the turret (writer
+                   and motor worker processes) are set up before the port
+                   is bound, as the server used to start
+  port first     - the default: bind, answer 503 while the turret comes
+                   up in the background
+
+and reports when the port first answered at all and when the first 200
+arrived, median of --runs starts.  Off the Pi this runs on mock_gpio.
+
+    python3 bench_startup.py [--runs 5] [--async]
+"""
+import argparse
+import http.client
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_once(defer, use_async, timeout=30.0):
+    port = free_port()
+    env = dict(os.environ, TURRET_PORT=str(port), TURRET_DEFER_HARDWARE='1' if defer else '0')
+    cmd = [sys.executable, 'main.py'] + (['--async'] if use_async else [])
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    first_answer = None
+    try:
+        while time.perf_counter() - t0 < timeout:
+            try:
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1.0)
+                conn.request('GET', '/api/position')
+                status = conn.getresponse().status
+                conn.close()
+            except OSError:
+                time.sleep(0.005)
+                continue
+            now = time.perf_counter() - t0
+            if first_answer is None:
+                first_answer = now
+            if status == 200:
+                return first_answer, now
+            time.sleep(0.005)
+        raise RuntimeError(f"no 200 from /api/position within {timeout}s")
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='server start-up benchmark')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--async', dest='use_async', action='store_true', help='asyncio server')
+    args = parser.parse_args()
+
+    print(f"{args.runs} starts each" + (" (asyncio server)" if args.use_async else ""))
+    print("mode           | first answer [ms] | first 200 [ms]")
+    print("-" * 52)
+    for name, defer in (('hardware first', False), ('port first', True)):
+        runs = [start_once(defer, args.use_async) for _ in range(args.runs)]
+        answer = statistics.median(r[0] for r in runs)
+        ok = statistics.median(r[1] for r in runs)
+        print(f"{name:14s} | {1e3 * answer:17.0f} | {1e3 * ok:14.0f}")
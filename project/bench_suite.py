@@ -0,0 +1,203 @@
+"""
+Benchmark suite: the turret stack against mock_gpio, results as JSON.
+
+Runs each benchmark below and writes every number to a JSON file (with
+the git commit, Python version and machine) so runs can be compared:
+
+  shifter - Shifter.shiftByte frames/s (alternating bytes, so every
+            frame is really shifted out)
+  stepper - achieved step rate of one Stepper move through an
+            OutputWriter, and its step interval jitter
+  firing  - getFiringAngles calls/s over the field targets (and
+            getFiringAnglesBatch targets/s if NumPy is installed)
+  server  - /api/position and /api/move latency against main.py started
+            on a free port
+
+    python3 bench_suite.py [--out bench_results.json] [--only shifter stepper]
+    python3 bench_suite.py --compare old.json      # also print new/old ratios
+
+The per-topic bench_*.py scripts go into more detail.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import shifter
+from bench_server import request
+from bench_startup import free_port
+from command import loadTargets, getFiringAngles
+from output import OutputWriter
+from profiles import Profile
+from shifter import Shifter
+from stepper_class_shiftregister_multiprocessing import Stepper
+
+
+def summary_ms(samples):
+    """mean/p50/p99/max of latencies given in seconds, in ms"""
+    ordered = sorted(samples)
+    return {
+        'mean_ms': 1e3 * statistics.mean(ordered),
+        'p50_ms': 1e3 * ordered[len(ordered) // 2],
+        'p99_ms': 1e3 * ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))],
+        'max_ms': 1e3 * ordered[-1],
+    }
+
+
+def bench_shifter(frames=20000):
+    s = Shifter(data=16, latch=20, clock=21)
+    pattern = [0b10100101, 0b01011010, 0b11110000, 0b00001111]
+    t = time.perf_counter()
+    for i in range(frames):
+        s.shiftByte(pattern[i & 3])
+    elapsed = time.perf_counter() - t
+    return {'frames': frames, 'frames_per_s': frames / elapsed}
+
+
+def bench_stepper(degrees=90.0, delay=Stepper.delay):
+    s = Shifter(data=16, latch=20, clock=21)
+    writer = OutputWriter(s, n_slots=1)
+    motor = Stepper(s, multiprocessing.Lock(), Profile.constant(delay), writer)
+    steps = round(degrees * Stepper.steps_per_degree)
+    t = time.perf_counter()
+    motor.rotate(degrees).wait()
+    elapsed = time.perf_counter() - t
+    jitter = motor.jitter.snapshot()
+    motor.worker.terminate()
+    writer.stop()
+    return {
+        'steps': steps,
+        'planned_steps_per_s': 1e6 / delay,
+        'steps_per_s': steps / elapsed,
+        'jitter_mean_us': jitter['mean_us'],
+        'jitter_p50_us': jitter['p50_us'],
+        'jitter_p99_us': jitter['p99_us'],
+        'jitter_max_us': jitter['max_us'],
+    }
+
+
+def bench_firing(repeats=200):
+    me, targets = loadTargets()
+    t = time.perf_counter()
+    for _ in range(repeats):
+        for target in targets:
+            getFiringAngles(me, target)
+    result = {'targets': len(targets),
+              'calls_per_s': repeats * len(targets) / (time.perf_counter() - t)}
+    try:
+        from command import getFiringAnglesBatch
+        many = targets * 400
+        getFiringAnglesBatch(me, many)
+        t = time.perf_counter()
+        for _ in range(20):
+            getFiringAnglesBatch(me, many)
+        result['batch_targets_per_s'] = 20 * len(many) / (time.perf_counter() - t)
+    except ImportError:
+        pass                    # no NumPy
+    return result
+
+
+def bench_server(samples=300, timeout=30.0):
+    port = free_port()
+    env = dict(os.environ, TURRET_PORT=str(port))
+    proc = subprocess.Popen([sys.executable, 'main.py'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        end = time.perf_counter() + timeout
+        while True:
+            try:
+                if request(port, 'GET', '/api/position') == 200:
+                    break
+            except OSError:
+                pass
+            if time.perf_counter() > end:
+                raise RuntimeError("server did not come up")
+            time.sleep(0.01)
+
+        results = {}
+        for name, method, path, body in (
+                ('position', 'GET', '/api/position', None),
+                ('move', 'POST', '/api/move', b'{"azimuth": 0, "altitude": 0}')):
+            times = []
+            for _ in range(samples):
+                t = time.perf_counter()
+                status = request(port, method, path, body)
+                times.append(time.perf_counter() - t)
+                if status != 200:
+                    raise RuntimeError(f"{method} {path}: HTTP {status}")
+            results[name] = summary_ms(times)
+        return results
+    finally:
+        proc.terminate()
+        proc.wait(10)
+
+
+BENCHMARKS = {
+    'shifter': bench_shifter,
+    'stepper': bench_stepper,
+    'firing': bench_firing,
+    'server': bench_server,
+}
+
+
+def flatten(results, prefix=''):
+    out = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            out.update(flatten(value, f"{prefix}{key}."))
+        else:
+            out[prefix + key] = value
+    return out
+
+
+def machine():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit or None,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'gpio': shifter.GPIO.__name__,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='turret benchmark suite')
+    parser.add_argument('--out', default='bench_results.json')
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--compare', metavar='JSON', help='earlier results to compare against')
+    args = parser.parse_args()
+    if shifter.GPIO.__name__ != 'mock_gpio':
+        print("warning: running on real GPIO, the motors will move")
+
+    results = {}
+    for name in args.only:
+        print(f"{name}...", flush=True)
+        results[name] = BENCHMARKS[name]()
+    report = {'machine': machine(), 'results': results}
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    old = {}
+    if args.compare:
+        with open(args.compare) as f:
+            old = flatten(json.load(f)['results'])
+    print(f"\n{'metric':38s} | {'value':>12s}" + (f" | {'before':>12s} | ratio" if old else ""))
+    print("-" * (53 + (24 if old else 0)))
+    for key, value in flatten(results).items():
+        line = f"{key:38s} | {value:12.4g}"
+        if key in old and old[key]:
+            line += f" | {old[key]:12.4g} | {value / old[key]:5.2f}"
+        print(line)
+    print(f"\nwrote {args.out}")
@@ -0,0 +1,106 @@
+"""
+Benchmark: sleep-after-step vs deadline-paced stepping.
+
+Runs the same constant-rate move both ways on the (mock) shift register and
+prints the total duration against the planned one plus the step interval
+jitter.  The old loop is reproduced here: step, then time.sleep(delay).
+The new one is the Stepper worker itself, read back through its shared
+jitter histogram.  --load starts busy processes to show drift under load.
+
+Off the Pi the frames are also taken from the mock_gpio trace, so the
+"pins" columns are the intervals between latched frames; a step counts as
+missed when its interval is over 1.5x the delay.
+
+    python3 bench_timing.py [--degrees 90] [--delay 1200] [--load 0]
+"""
+import argparse
+import multiprocessing
+import statistics
+import time
+
+from profiles import Profile
+import shifter
+from shifter import Shifter
+from stepper_class_shiftregister_multiprocessing import Stepper
+from timing import JitterHistogram
+
+
+def legacy_move(shifter, steps, delay):
+    """The old __rotate loop: step + sleep, with the same per-step work"""
+    hist = JitterHistogram()
+    outputs = multiprocessing.Value('i', 0)
+    angle = multiprocessing.Value('d', 0.0)
+    state, last = 0, None
+    t0 = time.perf_counter()
+    for _ in range(steps):
+        now = time.perf_counter()
+        if last is not None:
+            hist.record((now - last)*1e6 - delay)
+        last = now
+        state = (state + 1) % 8
+        with outputs.get_lock():
+            outputs.value = (outputs.value & ~0b1111) | Stepper.seq[state]
+            shifter.shiftByte(outputs.value)
+        with angle.get_lock():
+            angle.value = (angle.value + 1/Stepper.steps_per_degree) % 360
+        time.sleep(delay/1e6)
+    return time.perf_counter() - t0, hist
+
+
+def paced_move(shifter, degrees, delay):
+    motor = Stepper(shifter, multiprocessing.Lock(), Profile.constant(delay))
+    t0 = time.perf_counter()
+    motor.rotate(degrees).wait()
+    elapsed = time.perf_counter() - t0
+    motor.worker.terminate()
+    return elapsed, motor.jitter
+
+
+def pin_intervals():
+    """Intervals between latched frames in the mock_gpio trace [us]"""
+    if shifter.GPIO.__name__ != 'mock_gpio':
+        return None
+    times = [t for t, word in shifter.GPIO.frames(data=16, clock=21, latch=20)]
+    return [(b - a) / 1e3 for a, b in zip(times, times[1:])]
+
+
+def burn():
+    while True:
+        pass
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='step timing benchmark')
+    parser.add_argument('--degrees', type=float, default=90.0)
+    parser.add_argument('--delay', type=float, default=Stepper.delay, help='step delay [us]')
+    parser.add_argument('--load', type=int, default=0, help='number of busy processes')
+    args = parser.parse_args()
+
+    hogs = [multiprocessing.Process(target=burn, daemon=True) for _ in range(args.load)]
+    for p in hogs:
+        p.start()
+
+    s = Shifter(data=16, latch=20, clock=21)
+    steps = int(args.degrees * Stepper.steps_per_degree)
+    planned = steps * args.delay / 1e6
+    print(f"{steps} steps at {args.delay:.0f} us = {planned:.3f} s planned, {args.load} busy processes")
+    print("loop          | time [s] | drift [%] | mean err [us] | p50 [us] | p99 [us] | max [us] "
+          "| pins p50/p99 [us] | missed")
+    print("-" * 115)
+    for name, run in (('sleep', lambda: legacy_move(s, steps, args.delay)),
+                      ('deadline', lambda: paced_move(s, args.degrees, args.delay))):
+        if shifter.GPIO.__name__ == 'mock_gpio':
+            shifter.GPIO.clear()
+        elapsed, hist = run()
+        snap = hist.snapshot()
+        line = (f"{name:13s} | {elapsed:8.3f} | {100 * (elapsed / planned - 1):+9.1f} | "
+                f"{snap['mean_us']:13.1f} | {snap['p50_us']:8.0f} | {snap['p99_us']:8.0f} | {snap['max_us']:8.0f}")
+        gaps = pin_intervals()
+        if gaps:
+            q = statistics.quantiles(gaps, n=100)
+            missed = sum(g > 1.5 * args.delay for g in gaps)
+            line += f" | {q[49]:8.0f}/{q[98]:<8.0f} | {missed:6d}"
+        print(line)
+
+    for p in hogs:
+        p.terminate()
@@ -0,0 +1,110 @@
+"""
+Benchmark: per-step work in the Stepper hot loop vs compiled, cached moves.
+
+  prepare   - time to get a move ready: the old loop had nothing to prepare
+              but did it per step; compile_move on a cache miss and a hit
+  per step  - CPU time per step with no waiting, against mock_gpio: the old
+              __step (sequence index, mask and output worked out per step)
+              vs playing back a compiled move's nibbles
+
+Moves are the slews of the planned auto-target sequence, plus a jog chunk.
+
+    python3 bench_waveform.py [--repeats 5]
+"""
+import argparse
+import math
+import multiprocessing
+import time
+
+from command import loadAims
+from planner import plan_order
+from profiles import Profile
+from shifter import Shifter
+from stepper_class_shiftregister_multiprocessing import Stepper
+from waveform import compile_move, compile_rotation
+
+PROFILE = Profile.trapezoid(1200, 600, 4000)
+
+
+def target_deltas():
+    aims = loadAims()
+    order, _ = plan_order((0.0, 0.0), aims, profile=PROFILE)
+    here, deltas = (0.0, 0.0), []
+    for i in order:
+        deltas.append(math.degrees(aims[i][0] - here[0]))
+        deltas.append(math.degrees(aims[i][1] - here[1]))
+        here = aims[i]
+    return deltas
+
+
+def legacy_steps(s, outputs, angle, steps, direction):
+    """Old Stepper.__step body, once per step"""
+    state = 0
+    for _ in range(steps):
+        state = (state + direction) % 8
+        with outputs.get_lock():
+            mask = 0b1111 << 4
+            outputs.value = (outputs.value & ~mask) | (Stepper.seq[state] << 4)
+            s.shiftByte(outputs.value)
+        with angle.get_lock():
+            angle.value += direction / Stepper.steps_per_degree
+            angle.value %= 360
+
+
+def playback_steps(s, outputs, angle, move):
+    """Stepper.__play without the waiting"""
+    keep = ~(0b1111 << 4)
+    inc = move.direction / Stepper.steps_per_degree
+    for nibble in move.nibbles:
+        with outputs.get_lock():
+            new_output = (outputs.value & keep) | (nibble << 4)
+            outputs.value = new_output
+            s.shiftByte(new_output)
+        with angle.get_lock():
+            angle.value = (angle.value + inc) % 360
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='compiled move benchmark')
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    deltas = target_deltas()
+    jog = Profile.constant(1200)
+
+    compile_move.cache_clear()
+    t0 = time.perf_counter()
+    moves = [compile_rotation(d, PROFILE, 0, Stepper.steps_per_degree) for d in deltas]
+    miss = (time.perf_counter() - t0) / len(deltas)
+    t0 = time.perf_counter()
+    for _ in range(args.repeats):
+        for d in deltas:
+            compile_rotation(d, PROFILE, 0, Stepper.steps_per_degree)
+    hit = (time.perf_counter() - t0) / (len(deltas) * args.repeats)
+    t0 = time.perf_counter()
+    compile_move(16, 1, jog, 3)
+    jog_miss = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for _ in range(1000):
+        compile_move(16, 1, jog, 3)
+    jog_hit = (time.perf_counter() - t0) / 1000
+
+    steps = sum(m.steps for m in moves)
+    print(f"{len(deltas)} axis moves, {steps} steps")
+    print(f"prepare per move: compile {miss * 1e3:.3f} ms, cached {hit * 1e6:.2f} us")
+    print(f"prepare jog chunk (16 steps): compile {jog_miss * 1e6:.1f} us, cached {jog_hit * 1e6:.2f} us")
+
+    s = Shifter(data=16, latch=20, clock=21)
+    outputs = multiprocessing.Value('i', 0)
+    angle = multiprocessing.Value('d', 0.0)
+    t0 = time.perf_counter()
+    for m in moves:
+        legacy_steps(s, outputs, angle, m.steps, m.direction)
+    legacy = (time.perf_counter() - t0) / steps
+    t0 = time.perf_counter()
+    for m in moves:
+        playback_steps(s, outputs, angle, m)
+    played = (time.perf_counter() - t0) / steps
+    change = 100 * (played / legacy - 1)
+    print(f"per step: old loop {legacy * 1e6:.1f} us, playback {played * 1e6:.1f} us "
+          f"({abs(change):.0f}% {'more' if change > 0 else 'less'})")
@@ -0,0 +1,143 @@
+# broadcast.py
+#
+# Push-based turret state for the frontend (Server-Sent Events).
+#
+# Instead of every viewer polling /api/position and having the server build
+# and serialize the full payload each time, one sampler thread watches the
+# turret and the field layout and serializes a frame only when something
+# changed.  The same bytes object is handed to every subscriber, so adding
+# viewers costs a queue put each, not another json.dumps.  Broadcaster is
+# the shared fan-out part, also used for the motion telemetry stream.
+import json
+import threading
+import time
+
+
+def sse_frame(event, payload):
+    """Encode one SSE message (payload is JSON-encoded once, here)"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n".encode()
+
+
+KEEPALIVE_FRAME = b": keepalive\n\n"
+
+
+class Broadcaster:
+    """
+    Fan-out of pre-serialized SSE frames to subscribers.
+
+    Subscribers register a deliver(frame_bytes) callback.  The callback must
+    not block; returning False unsubscribes (used to drop slow clients).
+    A sampler thread calls poll() every `interval` seconds while anyone is
+    subscribed; subclasses override poll() (publishing whatever changed)
+    and current_frames() (what a new subscriber gets first).
+    """
+
+    def __init__(self, interval=0.02, keepalive=15.0):
+        self.interval = interval
+        self.keepalive = keepalive
+
+        self.lock = threading.Lock()
+        self.subscribers = {}
+        self._next_id = 0
+        self.frames_built = 0       # serializations, independent of subscriber count
+        self._thread = None
+
+    def poll(self):
+        """Publish whatever changed since the last poll (nothing by default)"""
+
+    def current_frames(self):
+        return []
+
+    def subscribe(self, deliver):
+        """Register a subscriber; it immediately gets current_frames()"""
+        self.poll()     # make sure the first frames are current
+        with self.lock:
+            token = self._next_id
+            self._next_id += 1
+            self.subscribers[token] = deliver
+            for frame in self.current_frames():
+                deliver(frame)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return token
+
+    def unsubscribe(self, token):
+        with self.lock:
+            self.subscribers.pop(token, None)
+
+    def publish(self, frame):
+        with self.lock:
+            subscribers = list(self.subscribers.items())
+        for token, deliver in subscribers:
+            try:
+                keep = deliver(frame)
+            except Exception:
+                keep = False
+            if keep is False:
+                self.unsubscribe(token)
+
+    def _run(self):
+        last_sent = time.monotonic()
+        while True:
+            with self.lock:
+                if not self.subscribers:
+                    self._thread = None
+                    return      # restarted by the next subscribe()
+            before = self.frames_built
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Broadcast error: {e}")
+            now = time.monotonic()
+            if self.frames_built != before:
+                last_sent = now
+            elif now - last_sent >= self.keepalive:
+                # Comment line; lets us notice clients that went away
+                self.publish(KEEPALIVE_FRAME)
+                last_sent = now
+            time.sleep(self.interval)
+
+
+class StateBroadcaster(Broadcaster):
+    """
+    Samples get_turret() every `interval` seconds and publishes a 'turret'
+    frame when the result differs from the last one.  get_field_source()
+    returns the raw field data (position_data); when a different object
+    shows up, build_field(source) is called and a 'field' frame published.
+    """
+
+    def __init__(self, get_turret, get_field_source, build_field, interval=0.02, keepalive=15.0):
+        super().__init__(interval, keepalive)
+        self.get_turret = get_turret
+        self.get_field_source = get_field_source
+        self.build_field = build_field
+        self.turret_frame = None
+        self.field_frame = None
+        self._last_turret = None
+        self._last_source = None
+
+    def current_frames(self):
+        return [f for f in (self.field_frame, self.turret_frame) if f is not None]
+
+    def poll(self):
+        """Check for changes once, publishing any new frames"""
+        with self.lock:
+            source = self.get_field_source()
+            field = None
+            if source is not self._last_source:
+                self._last_source = source
+                field = self.field_frame = sse_frame('field', self.build_field(source))
+                self.frames_built += 1
+
+            turret = self.get_turret()
+            frame = None
+            if turret != self._last_turret:
+                self._last_turret = turret
+                frame = self.turret_frame = sse_frame('turret', turret)
+                self.frames_built += 1
+
+        if field is not None:
+            self.publish(field)
+        if frame is not None:
+            self.publish(frame)
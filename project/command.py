@@ -1,23 +1,158 @@
-import requests
 import math as m
 import json
 import os
+import threading
+import time
+
+FALLBACK_PATH = os.path.join(os.path.dirname(__file__), '../frontend/public/positions.json')
+LASER_HEIGHT = 9.911  # cm - height of laser above ground (both firing solvers)
+
+def loadLocal():
+    with open(FALLBACK_PATH, 'r') as f:
+        return json.load(f)
+
+def loadFallback():
+    print('Using fallback local JSON file')
+    return loadLocal()
 
 def fetchJson(url, save_local=False):
-    fallback_path = os.path.join(os.path.dirname(__file__), '../frontend/public/positions.json')
-    
+    import requests     # imported on first use: it is slow to load on the Pi
     try:
         response = requests.get(url, timeout=5)
         return response.json()
     except Exception as e:
         print(f'Failed to fetch from {url}: {e}')
         # Try fallback file if it exists
-        if os.path.exists(fallback_path):
-            print('Using fallback local JSON file')
-            with open(fallback_path, 'r') as f:
-                return json.load(f)
+        if os.path.exists(FALLBACK_PATH):
+            return loadFallback()
         raise
 
+
+class PositionClient:
+    """
+    Keeps a cached copy of positions.json up to date.
+
+    Requests go through one pooled requests.Session (the connection stays
+    open between polls) and are conditional: the ETag / Last-Modified of
+    the last response are sent back as If-None-Match / If-Modified-Since,
+    so an unchanged file costs a bare 304.  start() refreshes in a
+    background thread every `interval` seconds.
+
+    get() is stale-while-revalidate: it returns the cached data at once,
+    and if that is older than max_age it also starts a refresh in the
+    background.  Only a get() with nothing cached yet waits for the server,
+    falling back to the local file like fetchJson(); initial `data` (e.g.
+    the local file) avoids that and is treated as stale.  on_update(data)
+    is called whenever the server sends new data.
+    """
+
+    def __init__(self, url, interval=2.0, timeout=2.0, on_update=None, data=None):
+        self.url = url
+        self.interval = interval
+        self.timeout = timeout
+        self.on_update = on_update
+        self.session = None        # created by the first request (see _session)
+        self.data = data
+        self.fetched = None        # time.monotonic() the server last confirmed data
+        self.etag = None
+        self.last_modified = None
+        self.requests = self.not_modified = self.updates = self.errors = 0
+        self._failing = False
+        self.lock = threading.Lock()           # one request at a time on the session
+        self._revalidating = threading.Lock()  # held while a background refresh runs
+        self._stop = threading.Event()
+        self._thread = None
+
+    def age(self):
+        """Seconds since the server last confirmed the data (None if never)"""
+        return None if self.fetched is None else time.monotonic() - self.fetched
+
+    def refresh(self):
+        """Conditional GET; returns True if it succeeded (changed or not)"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        with self.lock:
+            self.requests += 1
+            try:
+                response = self._session().get(self.url, headers=headers, timeout=self.timeout)
+                if response.status_code == 304 and self.data is not None:
+                    self.not_modified += 1
+                else:
+                    response.raise_for_status()
+                    data = response.json()
+                    self.etag = response.headers.get('ETag')
+                    self.last_modified = response.headers.get('Last-Modified')
+                    self._set(data)
+                self.fetched = time.monotonic()
+                self._failing = False
+                return True
+            except Exception as e:
+                self.errors += 1
+                if not self._failing:       # once per outage, not every interval
+                    print(f'Failed to fetch from {self.url}: {e}')
+                self._failing = True
+                return False
+
+    def get(self, max_age=None):
+        """Cached data; revalidated in the background once older than max_age"""
+        if self.data is None:
+            if not self.refresh() and self.data is None and os.path.exists(FALLBACK_PATH):
+                self._set(loadFallback())
+            if self.data is None:
+                raise RuntimeError(f'No position data from {self.url}')
+            return self.data
+        age = self.age()
+        if age is None or age > (self.interval if max_age is None else max_age):
+            self.revalidate()
+        return self.data
+
+    def revalidate(self):
+        """Refresh in a background thread, unless one is already running"""
+        if self._revalidating.acquire(blocking=False):
+            def run():
+                try:
+                    self.refresh()
+                finally:
+                    self._revalidating.release()
+            threading.Thread(target=run, daemon=True).start()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.__run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.timeout + 1)
+            self._thread = None
+        if self.session is not None:
+            self.session.close()
+
+    def __run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
+
+    def _session(self):
+        if self.session is None:
+            import requests     # imported on first use: it is slow to load on the Pi
+            self.session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=2)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+        return self.session
+
+    def _set(self, data):
+        self.data = data
+        self.updates += 1
+        if self.on_update is not None:
+            self.on_update(data)
+
 def getMePos(json,id):
     turrets = json['turrets']
     curPos = turrets[id]
@@ -35,9 +170,19 @@ def getGlobes(json):
     globes = json['globes']
     return [[globe['r'], globe['theta'], globe['z']] for globe in globes]
 
+def loadTargets(json=None, me='13'):
+    """Our position and every target, globes first then enemy turrets
+    (the auto-target order), from positions data or the local file"""
+    if json is None:
+        json = loadLocal()
+    return getMePos(json, me), getGlobes(json) + getEnemyPos(json, me)
+
+def loadAims(json=None, me='13'):
+    """Firing angles (azimuth, altitude) [rad] for every target of loadTargets()"""
+    curPos, targets = loadTargets(json, me)
+    return [getFiringAngles(curPos, target) for target in targets]
+
 def getFiringAngles(curPos, target):
-    LASER_HEIGHT = 9.911  # cm - height of laser above ground 
-    
     # Convert polar coordinates to Cartesian (x, y, z)
     # x = r*cos(theta), y = r*sin(theta)
     turret_x = curPos[0] * m.cos(curPos[1])
@@ -71,6 +216,33 @@ def getFiringAngles(curPos, target):
     
     return azimuth, altitude
 
+def getFiringAnglesBatch(shooters, targets, all_pairs=False):
+    """
+    getFiringAngles for many shooter/target pairs at once (needs NumPy).
+
+    shooters is [[r, theta], ...] and targets [[r, theta, z], ...] (lists
+    or arrays; a single shooter is broadcast).  Returns (azimuth, altitude)
+    arrays, one entry per pair; with all_pairs=True they have shape
+    (len(shooters), len(targets)), every shooter against every target.
+    """
+    import numpy as np
+
+    shooters = np.asarray(shooters, dtype=float).reshape(-1, 2)
+    targets = np.asarray(targets, dtype=float).reshape(-1, 3)
+    turret_r, turret_theta = shooters[:, 0], shooters[:, 1]
+    if all_pairs:
+        turret_r, turret_theta = turret_r[:, None], turret_theta[:, None]
+
+    # Same steps as getFiringAngles, on whole arrays
+    delta_x = targets[:, 0] * np.cos(targets[:, 1]) - turret_r * np.cos(turret_theta)
+    delta_y = targets[:, 0] * np.sin(targets[:, 1]) - turret_r * np.sin(turret_theta)
+    delta_z = targets[:, 2] - LASER_HEIGHT
+
+    azimuth = turret_theta + np.pi - np.arctan2(delta_y, delta_x)
+    azimuth = np.pi - (np.pi - azimuth) % (2 * np.pi)     # wrap to (-pi, pi]
+    altitude = np.arctan2(delta_z, np.hypot(delta_x, delta_y))
+    return azimuth, altitude
+
 
 if __name__ == "__main__":
     # For testing, load local JSON file instead of remote fetch
@@ -0,0 +1,124 @@
+# engagement.py
+#
+# Auto-targeting as a timeline: slew -> settle -> fire for every target,
+# with the slew to the next target queued the moment the laser turns off.
+#
+# The firing solutions are worked out before anything moves, so nothing
+# is computed between targets.  A slew ends when both motor workers report
+# the move finished (Move handles), not after an estimated time, and the
+# settle window is measured from there.  Everything the turret does goes
+# through the callbacks passed in, so this can be driven without hardware.
+import time
+
+
+class Timeline:
+    """
+    Dwell budget per target [s]: settle after the motors report the slew
+    done, fire with the laser on, then an optional gap before the next
+    slew is queued.  release=True de-energizes the coils while settled
+    (as move_to_position always did) to keep the motors cool.  A slew
+    not reported done within slew_timeout ends the run (a worker or the
+    output writer has died).
+    """
+
+    def __init__(self, settle=0.5, fire=3.0, gap=0.0, release=True, slew_timeout=30.0):
+        self.settle = settle
+        self.fire = fire
+        self.gap = gap
+        self.release = release
+        self.slew_timeout = slew_timeout
+
+    def dwell(self):
+        """Time at each target apart from slewing"""
+        return self.settle + self.fire + self.gap
+
+
+class Engagement:
+    """
+    Runs one auto-target sequence.
+
+    start_move(azimuth, altitude) queues an absolute move and returns the
+    Move handles to wait on; set_laser(bool) drives the laser; release()
+    turns the coils off; stop is a threading.Event that ends the run at
+    the next phase boundary (waits are cut short too).  No slew is queued
+    once stop is set; start_move should check it too (atomically with its
+    abort) if stop can be set from another thread.  on_phase(phase,
+    seconds) is called after every phase, e.g. for /api/metrics.
+    """
+
+    def __init__(self, timeline, start_move, set_laser, release, stop, on_phase=None):
+        self.timeline = timeline
+        self.start_move = start_move
+        self.set_laser = set_laser
+        self.release = release
+        self.stop = stop
+        self.on_phase = on_phase
+        self.timings = []       # per target: {'target', 'slew', 'settle', 'fire', 'gap'} [s]
+
+    def _phase(self, timing, phase, start):
+        now = time.perf_counter()
+        timing[phase] = now - start
+        if self.on_phase is not None:
+            self.on_phase(phase, now - start)
+        return now
+
+    def run(self, aims, order, describe=None):
+        """
+        Engage aims[i] (azimuth, altitude) [rad] for i in order.  describe(i)
+        may return a line printed when target i comes up.  Returns True if
+        every target was engaged, False if stopped (or a slew timed out).
+        """
+        tl = self.timeline
+        self.timings = []
+        if not order:
+            return True
+        if self.stop.is_set():
+            return False
+        moves = self.start_move(*aims[order[0]])
+        t = time.perf_counter()
+        for n, i in enumerate(order):
+            timing = {'target': i}
+            self.timings.append(timing)
+            if describe is not None:
+                print(f"\n[{n+1}/{len(order)}] {describe(i)}")
+
+            end = time.perf_counter() + tl.slew_timeout
+            if not all(move.wait(max(0.0, end - time.perf_counter())) for move in moves):
+                print(f"Slew to target {i} not finished after {tl.slew_timeout:.0f}s, stopping")
+                return False
+            t = self._phase(timing, 'slew', t)
+            if self.stop.is_set():
+                return False
+            if tl.release:
+                self.release()
+            if self.stop.wait(tl.settle):
+                return False
+            t = self._phase(timing, 'settle', t)
+
+            self.set_laser(True)
+            stopped = self.stop.wait(tl.fire)
+            self.set_laser(False)
+            t = self._phase(timing, 'fire', t)
+            if stopped:
+                return False
+
+            if tl.gap and self.stop.wait(tl.gap):
+                return False
+            if n + 1 < len(order):
+                if self.stop.is_set():
+                    return False
+                moves = self.start_move(*aims[order[n + 1]])     # the next slew, right away
+            t = self._phase(timing, 'gap', t)
+        return True
+
+    def report(self):
+        """Per-target phase timings as a printable table"""
+        lines = ["target | slew [s] | settle [s] | fire [s] | total [s]",
+                 "-" * 52]
+        for timing in self.timings:
+            phases = [timing.get(p) for p in ('slew', 'settle', 'fire')]
+            total = sum(p for p in phases if p is not None) + timing.get('gap', 0.0)
+            cells = ' | '.join(f"{p:{w}.2f}" if p is not None else f"{'-':>{w}s}"
+                               for p, w in zip(phases, (8, 10, 8)))
+            lines.append(f"{timing['target']:6d} | {cells} | {total:9.2f}")
+        return '\n'.join(lines)
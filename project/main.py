@@ -2,12 +2,20 @@
 import json
 import threading
 import time
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
 import os
 import multiprocessing
 from stepper_class_shiftregister_multiprocessing import Stepper
-from shifter import Shifter
+from shifter import make_shifter
+from output import OutputWriter
+from profiles import Profile
+from broadcast import StateBroadcaster
+from telemetry import TelemetryRing, TelemetryBroadcaster
+from planner import plan_order
+from engagement import Engagement, Timeline
+from metrics import CONTENT_TYPE, Exposition, HistogramFamily
+import queue
 import math
 try:
     from RPi import GPIO
@@ -17,58 +25,93 @@ except (ImportError, RuntimeError):
 from command import *
 import signal
 import sys
+import traceback
 
-PORT = 8080
+PORT = int(os.environ.get('TURRET_PORT', 8080))
 LASER_PIN = 22
 TEAM_NUMBER = '13' 
 JSON_URL = 'http://192.168.1.254:8000/positions.json'
+POSITION_REFRESH = 2.0   # positions.json is revalidated in the background this often [s]
+
+# Auto-targeting dwell per target [s]: settle once the motors report the
+# slew done, fire, then queue the next slew (see engagement.py)
+ENGAGEMENT_TIMELINE = Timeline(settle=0.5, fire=3.0, gap=0.0)
+
+# Step timing for moves: start at the safe 1.2 ms/step, ramp up to cruise
+# at 0.6 ms/step and back down (see profiles.py / bench_profiles.py)
+MOTION_PROFILE = Profile.trapezoid(1200, 600, 4000)
+
+# Lead time for a coordinated move: both workers start their move at the
+# same time.perf_counter() deadline this far after it is queued [s]
+MOVE_START_LEAD = 0.01
+# Longest move_to_position waits for the workers (a full turn takes ~5 s) [s]
+MOVE_TIMEOUT = 30.0
+
+# Shift register backend: 'gpio' bit-bangs the pins below, 'spi' sends each
+# frame over spidev (SER on MOSI/GPIO10, SRCLK on SCLK/GPIO11, RCLK on 27)
+SHIFTER_BACKEND = os.environ.get('TURRET_SHIFTER', 'gpio')
+SHIFTER_PINS = {
+    'gpio': dict(data=17, latch=27, clock=4),
+    'spi': dict(bus=0, device=0, latch=27),
+}
 
 # Position data - load local file on startup for testing
+# (replace it with set_position_data() so the field snapshot is rebuilt)
 position_data = None
+_startup_position_data = None
 try:
     fallback_path = os.path.join(os.path.dirname(__file__), '../frontend/public/positions.json')
     if os.path.exists(fallback_path):
-        import json as json_module
         with open(fallback_path, 'r') as f:
-            position_data = json_module.load(f)
+            _startup_position_data = json.load(f)
         print(f"Loaded local positions.json for testing")
 except Exception as e:
     print(f"Could not load local positions.json: {e}")
 
-# Setup laser pin
-GPIO.setup(LASER_PIN, GPIO.OUT)
-GPIO.output(LASER_PIN, GPIO.LOW)
-
 # Motor state
 class TurretState:
+    # Soft limits for manual jogging [rad]
+    AZIMUTH_LIMIT = 3.14
+    ALTITUDE_LIMIT = 1.57
+    
     def __init__(self):
-        self.azimuth = 0.0  # radians - current position
-        self.altitude = 0.0  # radians - current position
         self.laser_on = False
         self.lock = threading.Lock()
+        # Held while queuing motor commands so manual jogging and
+        # move_to_position never interleave their moves/position updates
+        self.motion_lock = threading.Lock()
+        # Held by emergency_stop() while aborting and by start_move() while
+        # checking its stop event and queuing, so no move slips in between
+        self.stop_lock = threading.Lock()
         
-        # Movement velocity (set by commands)
-        self.azimuth_velocity = 0.0  # -1, 0, or 1
-        self.altitude_velocity = 0.0  # -1, 0, or 1
+        # Movement velocity (set by commands), fraction of full speed
+        self.azimuth_velocity = 0.0  # -1 .. 1
+        self.altitude_velocity = 0.0  # -1 .. 1
         
         # Initialize hardware with multiprocessing steppers
-        self.shifter = Shifter(data=17, latch=27, clock=4)
+        self.shifter = make_shifter(SHIFTER_BACKEND, **SHIFTER_PINS[SHIFTER_BACKEND])
+        self.shifter.shiftByte(0)  # motors off by default
+        # One process owns the register; the motors publish coil patterns to it
+        self.output = OutputWriter(self.shifter, n_slots=2)
         
         # Create multiprocessing locks (one per motor)
         self.motor_lock_alt = multiprocessing.Lock()
         self.motor_lock_az = multiprocessing.Lock()
         
         # Motors - order matters! First gets bits 0-3, second gets bits 4-7
-        self.altitude_motor = Stepper(self.shifter, self.motor_lock_alt)  # QA-QD (bits 0-3)
-        self.azimuth_motor = Stepper(self.shifter, self.motor_lock_az)    # QE-QH (bits 4-7)
+        # Neither axis is continuous (hard stops), so moves never wrap
+        self.altitude_motor = Stepper(self.shifter, self.motor_lock_alt, MOTION_PROFILE, self.output,
+                                      TelemetryRing(), continuous=False)  # QA-QD (bits 0-3)
+        self.azimuth_motor = Stepper(self.shifter, self.motor_lock_az, MOTION_PROFILE, self.output,
+                                     TelemetryRing(), continuous=False)   # QE-QH (bits 4-7)
         
-        # Zero motors at start and turn off coils
+        # Zero motors at start
         self.altitude_motor.zero()
         self.azimuth_motor.zero()
-        self.shifter.shiftByte(0)  # motors off by default
         
         # Start continuous movement thread for manual control
         self.running = True
+        self.shut_down = False
         self.movement_thread = threading.Thread(target=self._movement_loop, daemon=True)
         self.movement_thread.start()
     
@@ -77,54 +120,72 @@ class TurretState:
             self.azimuth_velocity = max(-1, min(1, azimuth_vel))
             self.altitude_velocity = max(-1, min(1, altitude_vel))
     
-    def motors_off(self):
+    def motors_off(self, wait=True):
         """Turn off all motor coils to prevent overheating"""
-        # Wait for any pending movements to complete, then send 0 directly
-        time.sleep(0.05)
-        with Stepper.shifter_outputs.get_lock():
-            Stepper.shifter_outputs.value = 0
-            self.shifter.shiftByte(0)
+        # Wait for any pending movements to complete, then clear the outputs
+        if wait:
+            self.azimuth_motor.wait_idle(timeout=5.0)
+            self.altitude_motor.wait_idle(timeout=5.0)
+        self.output.clear(wait=wait)
+    
+    def emergency_stop(self, timeout=1.0):
+        """Abort every queued and in-flight move and de-energize the coils
+        
+        The workers stop before their next step, so this returns within
+        about one step period (plus process wake-up); positions stay exact.
+        """
+        self.set_velocity(0, 0)
+        self.set_laser(False)
+        with self.stop_lock:
+            stops = [self.azimuth_motor.abort(), self.altitude_motor.abort()]
+        for stop in stops:
+            stop.wait(timeout)
+        self.output.clear(wait=True)
+    
+    def _jog_limited(self, velocity, motor, sign, limit):
+        # Stop jogging an axis that has reached its soft limit, checked
+        # against the unwrapped step count (sign: motor -> turret direction)
+        position = sign * math.radians(motor.steps() / Stepper.steps_per_degree)
+        if (velocity > 0 and position >= limit) or (velocity < 0 and position <= -limit):
+            return 0.0
+        return velocity
     
     def _movement_loop(self):
-        """Manual velocity control - queues small movements to multiprocessing steppers"""
-        STEP_DEG = 1.15  # ~0.02 radians per movement chunk
-        was_moving = False
+        """Manual velocity control - jogs the motors inside their worker processes
+        
+        The soft limits are also passed to the workers, which stop at them
+        exactly rather than up to a poll interval late.
+        """
+        jogging = (0.0, 0.0)    # (azimuth, altitude) velocity last sent to the workers
         
         while self.running:
             with self.lock:
                 az_vel = self.azimuth_velocity
                 alt_vel = self.altitude_velocity
             
-            if az_vel != 0 or alt_vel != 0:
-                was_moving = True
-                # Queue movements to the motor worker processes
-                if az_vel != 0:
-                    self.azimuth_motor.rotate(-STEP_DEG * az_vel)  # negate for direction
-                if alt_vel != 0:
-                    self.altitude_motor.rotate(STEP_DEG * alt_vel)
-                
-                # Update position tracking
-                with self.lock:
-                    self.azimuth = max(-3.14, min(3.14, self.azimuth + 0.02 * az_vel))
-                    self.altitude = max(-1.57, min(1.57, self.altitude + 0.02 * alt_vel))
-                
-                # Wait for movement to complete before queuing more
-                time.sleep(0.02)
-            else:
-                if was_moving:
-                    # Just stopped - wait for queued movements to finish then turn off
-                    time.sleep(0.15)  # wait for any queued commands to complete
-                    self.motors_off()
-                    was_moving = False
-                time.sleep(0.05) 
+            az_vel = self._jog_limited(az_vel, self.azimuth_motor, -1, self.AZIMUTH_LIMIT)
+            alt_vel = self._jog_limited(alt_vel, self.altitude_motor, 1, self.ALTITUDE_LIMIT)
+            
+            if (az_vel, alt_vel) != jogging:
+                with self.motion_lock:
+                    # Only a velocity update unless a jog has to be started
+                    self.azimuth_motor.jog(-az_vel, math.degrees(self.AZIMUTH_LIMIT))  # negate for direction
+                    self.altitude_motor.jog(alt_vel, math.degrees(self.ALTITUDE_LIMIT))
+                    if az_vel == 0 and alt_vel == 0:
+                        # Just stopped - turn off once the workers are idle
+                        self.motors_off()
+                jogging = (az_vel, alt_vel)
+            time.sleep(0.02)
     
     def get_position(self):
+        """Position read back from the motor workers' step counters [rad]"""
         with self.lock:
-            return {
-                'azimuth': self.azimuth,
-                'altitude': self.altitude,
-                'laser': self.laser_on
-            }
+            laser = self.laser_on
+        return {
+            'azimuth': 0.0 - math.radians(self.azimuth_motor.position()),  # negated motor direction
+            'altitude': math.radians(self.altitude_motor.position()),
+            'laser': laser
+        }
     
     def set_laser(self, state):
         with self.lock:
@@ -133,62 +194,62 @@ class TurretState:
     
     def calibrate(self):
         """Set current position as zero reference (doesn't move turret)"""
-        with self.lock:
-            self.azimuth = 0.0
-            self.altitude = 0.0
-        # Also zero the motor's internal tracking
         self.azimuth_motor.zero()
         self.altitude_motor.zero()
         print("Calibrated: current position set to zero")
     
-    def move_to_position(self, target_azimuth, target_altitude):
-        """Move to absolute position - queues full movement to multiprocessing steppers"""
-        self.set_velocity(0, 0)
-        time.sleep(0.1)  # let velocity loop settle
-        
-        with self.lock:
-            current_az = self.azimuth
-            current_alt = self.altitude
-        
-        # Calculate deltas
-        delta_az = target_azimuth - current_az
-        delta_alt = target_altitude - current_alt
-        
-        # Convert to degrees for motors
-        delta_az_deg = -math.degrees(delta_az)  # negate for direction
-        delta_alt_deg = math.degrees(delta_alt)
-        
-        # Queue rotations to worker processes (they execute in parallel)
-        if abs(delta_az_deg) > 0.1:
-            self.azimuth_motor.rotate(delta_az_deg)
-        if abs(delta_alt_deg) > 0.1:
-            self.altitude_motor.rotate(delta_alt_deg)
+    def start_move(self, target_azimuth, target_altitude, stop=None):
+        """Queue a move to an absolute position [rad] without waiting
         
-        # Wait for movement to complete
-        # steps = degrees * (4096 steps/rev) / 360 deg/rev
-        # time = steps * 1200us delay
-        steps_az = abs(delta_az_deg) * 4096 / 360
-        steps_alt = abs(delta_alt_deg) * 4096 / 360
-        max_steps = max(steps_az, steps_alt)
-        wait_time = max_steps * 0.0012 + 0.3  # step_delay * steps + buffer
-        time.sleep(wait_time)
+        Returns the Move handles of both motors.  The workers work out the
+        steps to the target (never through the hard stops) when they get to
+        the move, so this needn't wait for a jog to wind down first.  Both
+        axes start together and the shorter one's steps are spread over the
+        longer one's, so they arrive together too.  Once the
+        threading.Event stop is set nothing is queued (returns []); set it
+        before emergency_stop() and a move can't start after the abort.
+        """
+        self.set_velocity(0, 0)
+        targets = [(self.azimuth_motor, -math.degrees(target_azimuth)),   # negated motor direction
+                   (self.altitude_motor, math.degrees(target_altitude))]
+        with self.motion_lock, self.stop_lock:
+            if stop is not None and stop.is_set():
+                return []
+            self.azimuth_motor.jog(0)
+            self.altitude_motor.jog(0)
+            pace = max(abs(motor.steps_to(angle)) for motor, angle in targets)
+            start_at = time.perf_counter() + MOVE_START_LEAD
+            return [motor.goAngle(angle, pace, start_at) for motor, angle in targets]
+    
+    def move_to_position(self, target_azimuth, target_altitude):
+        """Move to absolute position - queues full movement to multiprocessing steppers
         
-        # Update position tracking
-        with self.lock:
-            self.azimuth = target_azimuth
-            self.altitude = target_altitude
+        Blocks until both worker processes report the move finished, or
+        MOVE_TIMEOUT (returns False).  The target is rounded to whole steps
+        once, against the motors' step counters, so repeated moves never
+        accumulate rounding error.
+        """
+        end = time.perf_counter() + MOVE_TIMEOUT
+        done = all(move.wait(max(0.0, end - time.perf_counter()))
+                   for move in self.start_move(target_azimuth, target_altitude))
+        if not done:
+            print(f"Move not finished after {MOVE_TIMEOUT:.0f}s")
         
         # Turn off coils to prevent overheating
-        self.motors_off()
+        self.motors_off(wait=done)
+        return done
     
     def shutdown(self):
+        if self.shut_down:
+            return      # signal handler and run_server's cleanup both call this
+        self.shut_down = True
         print("Shutting down turret...")
         self.running = False
         self.set_velocity(0, 0)
         self.set_laser(False)
         
-        # Turn off motors
-        self.motors_off()
+        # Turn off motors (don't wait out a move in progress)
+        self.motors_off(wait=False)
         time.sleep(0.1)
         
         # Terminate motor worker processes
@@ -196,8 +257,13 @@ class TurretState:
             self.azimuth_motor.worker.terminate()
         if hasattr(self.altitude_motor, 'worker'):
             self.altitude_motor.worker.terminate()
+        self.output.stop()
+        for motor in (self.azimuth_motor, self.altitude_motor):
+            motor.telemetry.close()
+            motor.telemetry.unlink()
         
         # Clear shift register directly (workers are terminated)
+        self.shifter.invalidate()
         self.shifter.shiftByte(0)
         
         # Set GPIO pins low before cleanup
@@ -207,206 +273,375 @@ class TurretState:
         print("Turret shutdown complete")
 
 # Global state
-turret_state = TurretState()
-auto_target_running = False
+# The hardware is brought up after the port is bound (see run_server);
+# until then turret_state is None and the API answers 503.  If bring-up
+# fails, hardware_error holds the reason and the API answers 500 with it.
+turret_state = None
+hardware_error = None
+auto_target_stop = threading.Event()   # set by /api/stop-target
 server_instance = None
 
+# Bring the hardware up in the background once the server is listening
+# (0: set it up before binding the port, as before)
+DEFER_HARDWARE = os.environ.get('TURRET_DEFER_HARDWARE', '1') != '0'
+
+def bring_up():
+    """Set up the laser pin and the turret (forks the writer and motor workers)"""
+    global turret_state
+    t = time.perf_counter()
+    GPIO.setup(LASER_PIN, GPIO.OUT)
+    GPIO.output(LASER_PIN, GPIO.LOW)
+    state = TurretState()
+    telemetry_broadcaster.add('azimuth', state.azimuth_motor.telemetry)
+    telemetry_broadcaster.add('altitude', state.altitude_motor.telemetry)
+    turret_state = state
+    print(f"Turret ready ({time.perf_counter() - t:.2f}s)")
+    return state
+
 def signal_handler(sig, frame):
     """Handle shutdown signals (SIGINT, SIGTERM)"""
     print(f"\nReceived signal {sig}, shutting down...")
     if turret_state:
         turret_state.shutdown()
-    if server_instance:
-        server_instance.shutdown()
+    # No server_instance.shutdown() here: the handler runs on the thread that
+    # is inside serve_forever(), and shutdown() would wait on itself forever.
+    # SystemExit unwinds serve_forever() instead.
     sys.exit(0)
 
 def auto_target_sequence():
-    global auto_target_running, position_data
-    auto_target_running = True
+    auto_target_stop.clear()
     
     try:
-        # Fetch position data
-        print(f"Fetching JSON from {JSON_URL}")
-        position_data = fetchJson(JSON_URL)
+        # Cached position data (revalidated in the background), so the
+        # engagement starts without waiting on the network
+        data = position_client.get()
+        age = position_client.age()
+        print(f"Position data from {JSON_URL} "
+              + (f"({age:.1f}s old)" if age is not None else "(local fallback)"))
             
-        my_pos = getMePos(position_data, TEAM_NUMBER)
+        my_pos = getMePos(data, TEAM_NUMBER)
         print(f"Current position: r={my_pos[0]:.1f}cm, theta={my_pos[1]:.3f}rad")
             
-        enemies = getEnemyPos(position_data, TEAM_NUMBER)
-        globes = getGlobes(position_data)
+        enemies = getEnemyPos(data, TEAM_NUMBER)
+        globes = getGlobes(data)
         all_targets = globes + enemies 
             
         print(f"{len(enemies)} enemy turrets and {len(globes)} globe found")
         print(f"  Total targets: {len(all_targets)}")
-            
-        for i, target in enumerate(all_targets):
-            if not auto_target_running:
-                print("\nAuto-targeting STOPPED by user")
-                break
-                
-            target_type = "Globe" if i < len(globes) else "Enemy"
-            print(f"\n[{i+1}/{len(all_targets)}] Targeting {target_type}...")
-            print(f"  Position: r={target[0]:.1f}cm, theta={target[1]:.3f}rad, z={target[2]:.1f}cm")
-                
-            azimuth, altitude = getFiringAngles(my_pos, target)
-            print(f"  azimuth={azimuth:.3f}rad, altitude={altitude:.3f}rad")
-                    
-            turret_state.move_to_position(azimuth, altitude)
-                
-            time.sleep(0.5)
-            
-            if not auto_target_running:
-                break
-                
-            print(f"  LASER ON")
-            turret_state.set_laser(True)
-            time.sleep(3.0)
-            turret_state.set_laser(False)
-            print(f"  Laser off")
-            time.sleep(0.5)
-            
-        print("Targeting complete" if auto_target_running else "Targeting stopped")
+        
+        # Every firing solution up front, then order targets to minimise
+        # slewing (both axes move at once)
+        aims = [getFiringAngles(my_pos, target) for target in all_targets]
+        pos = turret_state.get_position()
+        order, slew_time = plan_order((pos['azimuth'], pos['altitude']), aims, profile=MOTION_PROFILE)
+        dwell_time = len(order) * ENGAGEMENT_TIMELINE.dwell()
+        print(f"  Estimated sequence time: {slew_time + dwell_time:.1f}s "
+              f"({slew_time:.1f}s slewing + {dwell_time:.1f}s settle/fire)")
+        
+        def describe(i):
+            target = all_targets[i]
+            return (f"Targeting {'Globe' if i < len(globes) else 'Enemy'}: "
+                    f"r={target[0]:.1f}cm, theta={target[1]:.3f}rad, z={target[2]:.1f}cm -> "
+                    f"azimuth={aims[i][0]:.3f}rad, altitude={aims[i][1]:.3f}rad")
+        
+        start_move = lambda azimuth, altitude: turret_state.start_move(azimuth, altitude, auto_target_stop)
+        engagement = Engagement(ENGAGEMENT_TIMELINE, start_move, turret_state.set_laser,
+                                turret_state.motors_off, auto_target_stop,
+                                on_phase=lambda phase, seconds: phase_duration.labels(phase).observe(seconds))
+        done = engagement.run(aims, order, describe)
+        turret_state.motors_off(wait=done)
+        
+        if not done:
+            print("\nAuto-targeting STOPPED by user")
+        print(engagement.report())
+        print("Targeting complete" if done else "Targeting stopped")
     finally:
-        auto_target_running = False
         turret_state.set_laser(False)
         
    
 
-class TurretHandler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        """Handle GET requests"""
-        parsed = urlparse(self.path)
-        
-        # API endpoints - send ALL data (turret + enemies + globes)
-        if parsed.path == '/api/position':
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            turret_pos = turret_state.get_position()
-            response = {'turret': turret_pos, 'enemies': [], 'globes': [], 'my_position': None}
-            
-            global position_data
-            if position_data:
-                try:
-                    my_pos = getMePos(position_data, TEAM_NUMBER)
-                    # Convert to Cartesian (Three.js uses Y as up, XZ as ground plane)
-                    my_x = my_pos[0] * math.cos(my_pos[1])
-                    my_z = my_pos[0] * math.sin(my_pos[1])
-                    response['my_position'] = {'x': my_x, 'z': my_z, 'angle_to_origin': math.atan2(-my_z, -my_x)}
-                    
-                    response['enemies'] = [
-                        {'x': e[0] * math.cos(e[1]), 'z': e[0] * math.sin(e[1]), 'y': e[2]}
-                        for e in getEnemyPos(position_data, TEAM_NUMBER)
-                    ]
-                    response['globes'] = [
-                        {'x': g[0] * math.cos(g[1]), 'z': g[0] * math.sin(g[1]), 'y': g[2]}
-                        for g in getGlobes(position_data)
-                    ]
-                except Exception as e:
-                    print(f"Error parsing positions: {e}")
-            
-            self.wfile.write(json.dumps(response).encode())
-            return
-        
-        self.send_error(404, 'Not found')
+def json_response(obj, status=200):
+    """Build a (status, headers, body) response tuple with a JSON body"""
+    return status, {'Content-Type': 'application/json'}, json.dumps(obj).encode()
+
+def error_response(status, message):
+    return json_response({'error': message}, status)
+
+def build_field_payload(data):
+    """Field layout (our position, enemies, globes) in frontend coordinates"""
+    field = {'enemies': [], 'globes': [], 'my_position': None}
     
-    def do_POST(self):
-        parsed = urlparse(self.path)
-        content_length = int(self.headers.get('Content-Length', 0))
-        body = self.rfile.read(content_length).decode('utf-8') if content_length > 0 else '{}'
-        
+    if data:
         try:
-            data = json.loads(body)
-        except json.JSONDecodeError:
-            self.send_error(400, 'Invalid JSON')
-            return
-        
-        # Motor velocity control
-        if parsed.path == '/api/move':
-            azimuth_vel = -float(data.get('azimuth', 0))  # Invert for correct direction
-            altitude_vel = -float(data.get('altitude', 0))
-            
-            turret_state.set_velocity(azimuth_vel, altitude_vel)
-            
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps({'status': 'ok'}).encode())
-            return
-        
-        # Laser control
-        elif parsed.path == '/api/laser':
-            turret_state.set_laser(bool(data.get('laser', False)))
-            
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps({'status': 'ok'}).encode())
-            return
-        
-        # Calibration
-        elif parsed.path == '/api/calibrate':
-            turret_state.calibrate()
+            my_pos = getMePos(data, TEAM_NUMBER)
+            # Convert to Cartesian (Three.js uses Y as up, XZ as ground plane)
+            my_x = my_pos[0] * math.cos(my_pos[1])
+            my_z = my_pos[0] * math.sin(my_pos[1])
+            field['my_position'] = {'x': my_x, 'z': my_z, 'angle_to_origin': math.atan2(-my_z, -my_x)}
             
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps({'status': 'ok'}).encode())
-            return
+            field['enemies'] = [
+                {'x': e[0] * math.cos(e[1]), 'z': e[0] * math.sin(e[1]), 'y': e[2]}
+                for e in getEnemyPos(data, TEAM_NUMBER)
+            ]
+            field['globes'] = [
+                {'x': g[0] * math.cos(g[1]), 'z': g[0] * math.sin(g[1]), 'y': g[2]}
+                for g in getGlobes(data)
+            ]
+        except Exception as e:
+            print(f"Error parsing positions: {e}")
+    return field
+
+class FieldSnapshot:
+    """
+    Field layout for one version of position_data, computed and JSON-encoded
+    once.  /api/position splices `encoded` into its response and uses
+    `version` in the ETag, so polls never redo the trig or serialization.
+    """
+    def __init__(self, data, version):
+        self.data = data
+        self.version = version
+        self.payload = build_field_payload(data)
+        # '"enemies": [...], "globes": [...], "my_position": ...' without the braces
+        self.encoded = json.dumps(self.payload)[1:-1].encode()
+
+field_lock = threading.Lock()
+field_snapshot = FieldSnapshot(None, 0)
+
+def set_position_data(data):
+    """Replace position_data and rebuild the field snapshot (new version)"""
+    global position_data, field_snapshot
+    snapshot = FieldSnapshot(data, field_snapshot.version + 1)
+    with field_lock:
+        position_data = data
+        field_snapshot = snapshot
+
+set_position_data(_startup_position_data)
+
+# Keeps position_data in step with the server (see command.PositionClient)
+position_client = PositionClient(JSON_URL, interval=POSITION_REFRESH,
+                                 on_update=set_position_data, data=_startup_position_data)
+
+def position_etag(snapshot, turret_pos):
+    # Field version plus the raw turret values - no JSON needed to compare
+    return '"%d-%r-%r-%d"' % (snapshot.version, turret_pos['azimuth'],
+                              turret_pos['altitude'], turret_pos['laser'])
+
+def get_position_response(headers):
+    """/api/position with ETag/If-None-Match: unchanged polls get a bare 304"""
+    snapshot = field_snapshot
+    turret_pos = turret_state.get_position()
+    etag = position_etag(snapshot, turret_pos)
+    cache_headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    
+    if headers.get('if-none-match') == etag:
+        return 304, cache_headers, b''
+    
+    body = b'{"turret": ' + json.dumps(turret_pos).encode() + b', ' + snapshot.encoded + b'}'
+    cache_headers['Content-Type'] = 'application/json'
+    return 200, cache_headers, body
+
+# Push updates for /api/stream - turret frames only when the turret moves,
+# field frames only when position_data is replaced (new snapshot)
+broadcaster = StateBroadcaster(
+    get_turret=lambda: turret_state.get_position() if turret_state else None,
+    get_field_source=lambda: field_snapshot,
+    build_field=lambda snapshot: snapshot.payload,
+)
+
+# Per-step motion history for /api/telemetry, read from the workers'
+# shared-memory rings (added by bring_up())
+telemetry_broadcaster = TelemetryBroadcaster({})
+
+# /api/metrics (Prometheus text).  Routes outside ROUTES are counted as
+# 'other' so stray URLs can't create new series.
+METRICS_PATH = '/api/metrics'
+ROUTES = {'/api/position', '/api/move', '/api/laser', '/api/calibrate', '/api/auto-target',
+          '/api/stop-target', '/api/fetch-json', METRICS_PATH}
+request_latency = HistogramFamily(
+    'turret_request_duration_seconds', 'API request handling time',
+    (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5), ('method', 'route'))
+phase_duration = HistogramFamily(
+    'turret_autotarget_phase_seconds', 'Auto-target phase durations per target',
+    (0.01, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 4.0, 6.0, 10.0), ('phase',))
+
+def get_metrics_response():
+    out = Exposition()
+    out.gauge('turret_up', 'Turret hardware is up', [({}, int(turret_state is not None))])
+    out.gauge('turret_hardware_failed', 'Hardware bring-up failed', [({}, int(hardware_error is not None))])
+    out.family(request_latency)
+    out.family(phase_duration)
+    if turret_state is not None:
+        motors = [({'motor': 'azimuth'}, turret_state.azimuth_motor),
+                  ({'motor': 'altitude'}, turret_state.altitude_motor)]
+        out.gauge('turret_motor_queue_depth', 'Commands waiting in Stepper.queue',
+                  [(labels, m.queue_depth()) for labels, m in motors])
+        out.counter('turret_motor_steps_total', 'Steps output',
+                    [(labels, m.step_count.value) for labels, m in motors])
+        out.counter('turret_motor_missed_deadlines_total', 'Steps more than a step period late',
+                    [(labels, m.missed.value) for labels, m in motors])
+        out.counter('turret_motor_commands_total', 'Commands carried out',
+                    [(labels, m.executed.value) for labels, m in motors])
+        out.counter('turret_motor_coalesced_total', 'Commands merged away by the worker',
+                    [(labels, m.coalesced.value) for labels, m in motors])
+        out.histogram('turret_motor_step_jitter_microseconds', 'Step interval error',
+                      [(labels, m.jitter.cumulative()) for labels, m in motors])
+        out.counter('turret_output_stalls_total', 'Coil patterns that waited for the previous latch',
+                    [(labels, turret_state.output.stalls[m.slot]) for labels, m in motors])
+        out.counter('turret_output_lost_total', 'Coil patterns overwritten before they were latched',
+                    [(labels, turret_state.output.lost[m.slot]) for labels, m in motors])
+        out.counter('turret_output_ticks_total', 'Frames latched by the output writer',
+                    [({}, turret_state.output.ticks.value)])
+        out.counter('turret_shifter_frames_total', 'Shift register frames latched',
+                    [({}, turret_state.shifter.frames.value)])
+    return 200, {'Content-Type': CONTENT_TYPE}, out.encode()
+
+def handle_get(path, headers):
+    # API endpoints - send ALL data (turret + enemies + globes)
+    if path == '/api/position':
+        return get_position_response(headers)
+    
+    if path == METRICS_PATH:
+        return get_metrics_response()
+    
+    return error_response(404, 'Not found')
+
+def handle_post(path, headers, body):
+    try:
+        data = json.loads(body.decode('utf-8') if body else '{}')
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return error_response(400, 'Invalid JSON')
+    
+    # Motor velocity control
+    if path == '/api/move':
+        azimuth_vel = -float(data.get('azimuth', 0))  # Invert for correct direction
+        altitude_vel = -float(data.get('altitude', 0))
+        turret_state.set_velocity(azimuth_vel, altitude_vel)
+        return json_response({'status': 'ok'})
+    
+    # Laser control
+    elif path == '/api/laser':
+        turret_state.set_laser(bool(data.get('laser', False)))
+        return json_response({'status': 'ok'})
+    
+    # Calibration
+    elif path == '/api/calibrate':
+        turret_state.calibrate()
+        return json_response({'status': 'ok'})
+    
+    # Auto-targeting sequence
+    elif path == '/api/auto-target':
+        threading.Thread(target=auto_target_sequence, daemon=True).start()
+        return json_response({'status': 'ok'})
+    
+    # Stop auto-targeting
+    elif path == '/api/stop-target':
+        auto_target_stop.set()
+        turret_state.emergency_stop()
+        return json_response({'status': 'ok'})
+    
+    # Fetch JSON - manual refresh
+    elif path == '/api/fetch-json':
+        if not position_client.refresh():
+            return error_response(500, f'Failed to fetch from {JSON_URL}')
+        return json_response({'status': 'ok'})
+    
+    return error_response(404, 'Endpoint not found')
+
+def route_request(method, path, headers, body=b''):
+    """Dispatch one API request; shared by the threaded and asyncio servers.
+    
+    headers only needs a case-insensitive-friendly .get() (lowercase keys
+    are used), and the return value is a (status, headers, body) tuple.
+    """
+    path = urlparse(path).path
+    if turret_state is None and method in ('GET', 'POST') and path != METRICS_PATH:
+        if hardware_error is not None:
+            return error_response(500, f'Hardware failed: {hardware_error}')
+        status, headers, body = error_response(503, 'Turret starting up')
+        headers['Retry-After'] = '1'
+        return status, headers, body
+    if method in ('GET', 'POST'):
+        t = time.perf_counter()
+        if method == 'GET':
+            response = handle_get(path, headers)
+        else:
+            response = handle_post(path, headers, body)
+        request_latency.labels(method, path if path in ROUTES else 'other').observe(time.perf_counter() - t)
+        return response
+    if method == 'OPTIONS':
+        # CORS preflight
+        return 200, {
+            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+            'Access-Control-Allow-Headers': 'Content-Type',
+        }, b''
+    return error_response(405, 'Method not allowed')
+
+STREAM_PATH = '/api/stream'
+TELEMETRY_PATH = '/api/telemetry'
+STREAMS = {STREAM_PATH: broadcaster, TELEMETRY_PATH: telemetry_broadcaster}
+
+class TurretHandler(BaseHTTPRequestHandler):
+    def _dispatch(self, method):
+        content_length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(content_length) if content_length > 0 else b''
         
-        # Auto-targeting sequence
-        elif parsed.path == '/api/auto-target':
-            threading.Thread(target=auto_target_sequence, daemon=True).start()
-            
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps({'status': 'ok'}).encode())
-            return
+        status, headers, payload = route_request(method, self.path, self.headers, body)
         
-        # Stop auto-targeting
-        elif parsed.path == '/api/stop-target':
-            global auto_target_running
-            auto_target_running = False
-            turret_state.set_velocity(0, 0)
-            turret_state.set_laser(False)
-            
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps({'status': 'ok'}).encode())
-            return
+        self.send_response(status)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if payload or status >= 400:
+            self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+    
+    def _stream(self, source):
+        """Server-Sent Events: write broadcaster frames until the client goes away"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
         
-        # Fetch JSON - manual refresh
-        elif parsed.path == '/api/fetch-json':
-            global position_data
+        frames = queue.Queue(maxsize=64)
+        hangup = threading.Event()
+        def deliver(frame):
             try:
-                position_data = fetchJson(JSON_URL, save_local=False)
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'status': 'ok'}).encode())
-            except Exception as e:
-                self.send_error(500, f'Failed to fetch: {str(e)}')
-            return
+                frames.put_nowait(frame)
+            except queue.Full:
+                hangup.set()   # too far behind - drop it, EventSource reconnects
+                return False
         
-        self.send_error(404, 'Endpoint not found')
+        token = source.subscribe(deliver)
+        try:
+            while not hangup.is_set():
+                try:
+                    frame = frames.get(timeout=1.0)
+                except queue.Empty:
+                    continue
+                self.wfile.write(frame)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            source.unsubscribe(token)
+    
+    def do_GET(self):
+        """Handle GET requests"""
+        stream = STREAMS.get(urlparse(self.path).path)
+        if stream is not None:
+            self._stream(stream)
+            return
+        self._dispatch('GET')
+    
+    def do_POST(self):
+        self._dispatch('POST')
     
     def do_OPTIONS(self):
         """Handle CORS preflight"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+        self._dispatch('OPTIONS')
     
     def log_message(self, format, *args):
         """Custom log format - suppress position polling spam"""
@@ -415,25 +650,61 @@ class TurretHandler(BaseHTTPRequestHandler):
         if '/api/position' not in message:
             print(f"[{self.date_time_string()}] {message}")
 
-def run_server():
-    """Start the HTTP server"""
+def run_server(use_async=False):
+    """Start the HTTP server
+    
+    use_async=True serves the same routes from an asyncio event loop so a
+    slow client can't hold up everyone else (see async_server.py).
+    """
     global server_instance
     
     # Register signal handlers for graceful shutdown
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
-    server = HTTPServer(('0.0.0.0', PORT), TurretHandler)
+    # Answer (503) as soon as the port is bound; the turret comes up meanwhile
+    listening = threading.Event()
+    def start_up():
+        global hardware_error
+        listening.wait()
+        try:
+            bring_up()
+        except Exception as e:
+            if not DEFER_HARDWARE:
+                raise               # nothing is listening yet: exit as before
+            traceback.print_exc()
+            hardware_error = f"{type(e).__name__}: {e}"
+            print(f"Hardware bring-up failed ({hardware_error}); API requests will get 500")
+            return
+        position_client.start()
+    if DEFER_HARDWARE:
+        threading.Thread(target=start_up, daemon=True).start()
+    else:
+        listening.set()
+        start_up()
+    
+    if use_async:
+        from async_server import AsyncTurretServer
+        server = AsyncTurretServer(route_request, '0.0.0.0', PORT, streams=STREAMS)
+    else:
+        # Threaded so open /api/stream connections don't block other requests
+        server = ThreadingHTTPServer(('0.0.0.0', PORT), TurretHandler)
+        server.daemon_threads = True
+        listening.set()
     server_instance = server
     
-    print(f"API Server: http://localhost:{PORT}")
+    print(f"API Server: http://localhost:{PORT}" + (" (asyncio)" if use_async else ""))
     print(f"Frontend: http://localhost:5173 (run: cd frontend && npm run dev)")
     
     try:
-        server.serve_forever()
+        if use_async:
+            server.serve_forever(listening)
+        else:
+            server.serve_forever()
     except (KeyboardInterrupt, SystemExit):
         pass  # Handled by signal_handler
     finally:
+        position_client.stop()
         # Cleanup in case signal handler didn't run
         if turret_state:
             try:
@@ -442,5 +713,5 @@ def run_server():
                 print(f"Error during turret shutdown: {e}")
 
 if __name__ == '__main__':
-    run_server()
+    run_server(use_async='--async' in sys.argv)
 
@@ -0,0 +1,112 @@
+# metrics.py
+#
+# Prometheus text format for /api/metrics.
+#
+# Counters bumped on every step (Stepper.step_count, Shifter.frames, ...)
+# live in shared memory next to whatever they count, written without a
+# lock by the one process that owns them, and are only read here.  Request
+# latencies and auto-target phase timings are recorded in the server
+# process into the Histograms below (a bisect and two adds under a lock).
+import bisect
+import threading
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    """Observation counts per bucket (upper bounds, inclusive) plus sum"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)     # the last one is +Inf
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def snapshot(self):
+        """(upper bounds, cumulative counts, sum) - the last bound is +Inf"""
+        with self.lock:
+            counts, total = list(self.counts), self.sum
+        cumulative, seen = [], 0
+        for n in counts:
+            seen += n
+            cumulative.append(seen)
+        return self.buckets + (float('inf'),), cumulative, total
+
+
+class HistogramFamily:
+    """Histograms of one metric, one per set of label values"""
+
+    def __init__(self, name, help, buckets, labels):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.label_names = labels
+        self.children = {}
+        self.lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            with self.lock:
+                child = self.children.setdefault(values, Histogram(self.buckets))
+        return child
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+               for v in labels.values())
+    return '{' + ','.join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + '}'
+
+
+def _value(v):
+    if v == float('inf'):
+        return '+Inf'
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class Exposition:
+    """Builds one /api/metrics response"""
+
+    def __init__(self):
+        self.lines = []
+
+    def _header(self, name, kind, help):
+        self.lines.append(f'# HELP {name} {help}')
+        self.lines.append(f'# TYPE {name} {kind}')
+
+    def counter(self, name, help, samples):
+        """samples: [(labels dict, value), ...]"""
+        self._header(name, 'counter', help)
+        for labels, value in samples:
+            self.lines.append(f'{name}{_labels(labels)} {_value(value)}')
+
+    def gauge(self, name, help, samples):
+        self._header(name, 'gauge', help)
+        for labels, value in samples:
+            self.lines.append(f'{name}{_labels(labels)} {_value(value)}')
+
+    def histogram(self, name, help, samples):
+        """samples: [(labels dict, (upper bounds, cumulative counts, sum)), ...]"""
+        self._header(name, 'histogram', help)
+        for labels, (bounds, cumulative, total) in samples:
+            for bound, count in zip(bounds, cumulative):
+                le = dict(labels, le=_value(bound) if bound == float('inf') else repr(float(bound)))
+                self.lines.append(f'{name}_bucket{_labels(le)} {count}')
+            self.lines.append(f'{name}_sum{_labels(labels)} {_value(float(total))}')
+            self.lines.append(f'{name}_count{_labels(labels)} {cumulative[-1]}')
+
+    def family(self, family):
+        self.histogram(family.name, family.help,
+                       [(dict(zip(family.label_names, values)), child.snapshot())
+                        for values, child in sorted(family.children.items())])
+
+    def encode(self):
+        return ('\n'.join(self.lines) + '\n').encode()
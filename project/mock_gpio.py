@@ -1,4 +1,21 @@
-"""Mock GPIO for testing on non-Raspberry Pi systems"""
+"""Mock GPIO for testing on non-Raspberry Pi systems
+
+Every pin transition is recorded with a time.perf_counter_ns() timestamp in
+a fixed-size ring buffer, so step rates, shift register frames and laser
+timing can be measured off the Pi:
+
+    import mock_gpio
+    mock_gpio.clear()
+    ...drive the motors...
+    frames = mock_gpio.frames(data=17, clock=4, latch=27)   # [(t_ns, word), ...]
+    t, pin, value = mock_gpio.to_numpy()                   # needs numpy
+
+The buffer lives in shared memory created at import, so transitions made
+by forked Stepper worker processes show up in the parent's trace.  Once
+the buffer is full the oldest events are overwritten (see dropped()).
+"""
+import time
+import multiprocessing
 
 # Pin modes
 BCM = 'BCM'
@@ -7,6 +24,16 @@ IN = 'IN'
 HIGH = 1
 LOW = 0
 
+RING_SIZE = 1 << 16     # events kept
+NUM_PINS = 64
+
+_times = multiprocessing.RawArray('q', RING_SIZE)
+_pins = multiprocessing.RawArray('h', RING_SIZE)
+_values = multiprocessing.RawArray('b', RING_SIZE)
+_levels = multiprocessing.RawArray('b', [-1] * NUM_PINS)   # -1 = never written
+_head = multiprocessing.Value('q', 0)     # events written so far; its lock guards the ring
+_start = multiprocessing.RawArray('b', NUM_PINS)            # pin levels when the trace began
+
 def setmode(mode):
     pass
 
@@ -14,8 +41,88 @@ def setup(pin, mode):
     pass
 
 def output(pin, state):
-    pass
+    # RPi.GPIO also takes lists/tuples of pins and values, set in order
+    if isinstance(pin, (list, tuple)):
+        if not isinstance(state, (list, tuple)):
+            state = [state] * len(pin)
+        if len(pin) != len(state):
+            raise ValueError("number of pins and values differ")
+        for p, s in zip(pin, state):
+            _record(p, s)
+    else:
+        _record(pin, state)
+
+def input(pin):
+    return max(_levels[pin], 0)
 
 def cleanup():
     pass
 
+def _record(pin, state):
+    value = 1 if state else 0
+    with _head.get_lock():
+        if _levels[pin] == value:
+            return                        # not a transition
+        _levels[pin] = value
+        i = _head.value % RING_SIZE
+        _times[i] = time.perf_counter_ns()
+        _pins[i] = pin
+        _values[i] = value
+        _head.value += 1
+
+def clear():
+    """Forget the recorded events (pin levels are kept)"""
+    with _head.get_lock():
+        _head.value = 0
+        for pin in range(NUM_PINS):
+            _start[pin] = max(_levels[pin], 0)
+
+def dropped():
+    """Number of events overwritten since the last clear()"""
+    return max(0, _head.value - RING_SIZE)
+
+def trace():
+    """Recorded transitions, oldest first: [(t_ns, pin, value), ...]"""
+    with _head.get_lock():
+        n = _head.value
+        start = max(0, n - RING_SIZE)
+        idx = [i % RING_SIZE for i in range(start, n)]
+        return [(_times[i], _pins[i], _values[i]) for i in idx]
+
+def frames(data, clock, latch, num_bits=8, events=None):
+    """
+    Decode Shifter traffic into latched frames: [(t_ns, word), ...] where
+    word is the value passed to Shifter.shiftWord(word, num_bits).  The
+    register is modelled from the start of the trace, so the first frame
+    is only right if it was fully recorded.
+    """
+    if events is None:
+        events = trace()
+        if dropped():
+            level = {data: 0, clock: 0, latch: 0}
+        else:
+            level = {data: _start[data], clock: _start[clock], latch: _start[latch]}
+    else:
+        level = {data: 0, clock: 0, latch: 0}
+    word = 0
+    out = []
+    top = num_bits - 1
+    for t, pin, value in events:
+        if pin not in level:
+            continue
+        rising = value and not level[pin]
+        level[pin] = value
+        if rising and pin == clock:
+            # the first bit shifted in ends up furthest along, i.e. bit 0
+            word = (word >> 1) | (level[data] << top)
+        elif rising and pin == latch:
+            out.append((t, word))
+    return out
+
+def to_numpy(events=None):
+    """Trace as NumPy arrays (t_ns int64, pin int16, value int8)"""
+    import numpy as np
+    if events is None:
+        events = trace()
+    arr = np.array(events, dtype=np.int64).reshape(-1, 3)
+    return arr[:, 0], arr[:, 1].astype(np.int16), arr[:, 2].astype(np.int8)
@@ -0,0 +1,142 @@
+# output.py
+#
+# Single-owner shift register output.
+#
+# With the shared Stepper.shifter_outputs Value, every step of every motor
+# takes the same lock, does a read-modify-write and bit-bangs a whole frame
+# while holding it, so motor processes queue up behind each other.  Here
+# each motor only stores its 4-bit coil pattern in its own byte of shared
+# memory (a single-byte store, so no lock is needed), and one writer process
+# merges all the slots and latches a frame whenever one of them changes.
+#
+# Each slot has a write counter, and the writer publishes which write it
+# has latched.  A motor whose previous pattern has not been latched yet
+# waits for it (a stall) rather than overwriting it, which would skip a
+# step.  The writer blocks on a semaphore between frames: every put() wakes
+# it and it latches a frame holding whatever the slots contain by then,
+# so nothing spins and an idle turret costs no CPU.
+import os
+import time
+import multiprocessing
+
+
+class OutputWriter:
+    """
+    Owns a (chained) shift register; motors attach() to get a slot and
+    put() coil patterns into it.  Slot i drives bits 4*i..4*i+3.
+    """
+
+    poll = 50e-6          # sleep between checks while put()/clear() wait for a latch [s]
+    stall_timeout = 0.01  # put() gives up waiting for a latch after this (~8 step periods) [s]
+
+    def __init__(self, shifter, n_slots=2):
+        self.s = shifter
+        self.n_slots = n_slots
+        self.nbits = 8 * ((4 * n_slots + 7) // 8)
+        self.slots = multiprocessing.RawArray('B', n_slots)     # coil pattern per motor
+        self.writes = multiprocessing.RawArray('l', n_slots)    # put() count per slot
+        self.latched = multiprocessing.RawArray('l', n_slots)   # last put() latched per slot
+        self.ticks = multiprocessing.RawValue('l', 0)           # frames latched so far
+        self.stalls = multiprocessing.RawArray('l', n_slots)    # put()s that waited for a latch
+        self.lost = multiprocessing.RawArray('l', n_slots)      # patterns overwritten unlatched
+        # sync(): frames requested, and the last request a latched frame covers
+        self.requested = multiprocessing.Value('l', 0)
+        self.served = multiprocessing.RawValue('l', 0)
+        # Released once per put(); a semaphore rather than an Event because
+        # Event.set() waits on its sleepers and would hang on a dead writer
+        self.wake = multiprocessing.Semaphore(0)
+        self.running = multiprocessing.RawValue('b', 1)
+        self._attached = 0
+        self._owner = os.getpid()
+
+        self.worker = multiprocessing.Process(target=self.__run)
+        self.worker.daemon = True
+        self.worker.start()
+
+    def attach(self):
+        """Reserve the next slot; returns its index"""
+        if self._attached >= self.n_slots:
+            raise ValueError(f"all {self.n_slots} output slots are in use")
+        self._attached += 1
+        return self._attached - 1
+
+    def put(self, slot, nibble):
+        """Set one motor's coil pattern; latched as soon as the writer wakes
+
+        Waits for the previous pattern to be latched first, but not past
+        stall_timeout or once the writer has stopped (a dead writer must
+        not hang the motor worker): the pattern is then overwritten and
+        counted in lost.
+        """
+        writes = self.writes
+        if self.latched[slot] != writes[slot]:
+            self.stalls[slot] += 1
+            end = time.perf_counter() + self.stall_timeout
+            while self.latched[slot] != writes[slot]:
+                if not self.running.value or time.perf_counter() > end:
+                    self.lost[slot] += 1
+                    break
+                time.sleep(self.poll)       # the writer is already awake for it
+        self.slots[slot] = nibble
+        writes[slot] += 1
+        self.wake.release()
+
+    def clear(self, wait=False):
+        """De-energize every motor; with wait=True, until it has been latched"""
+        if self._writer_alive():
+            # Let the last pattern put() in each slot reach the pins first,
+            # or the step it stands for is counted but never taken
+            end = time.perf_counter() + 0.1
+            while list(self.latched) != list(self.writes) and time.perf_counter() < end:
+                time.sleep(self.poll)
+        for i in range(self.n_slots):
+            self.slots[i] = 0
+        if wait:
+            self.sync()
+        elif self._writer_alive():
+            self.wake.release()
+
+    def sync(self, timeout=0.1):
+        """Wait until a frame started after this call has been latched"""
+        with self.requested.get_lock():
+            self.requested.value += 1
+            target = self.requested.value
+        self.wake.release()
+        end = time.perf_counter() + timeout
+        while self.served.value < target and time.perf_counter() < end:
+            time.sleep(self.poll)
+
+    def stop(self):
+        self.running.value = 0
+        if self._writer_alive():
+            self.wake.release()
+            if self._owner == os.getpid():
+                self.worker.join(1.0)
+
+    def _writer_alive(self):
+        # Only the creating process can ask the Process object; motor
+        # workers calling clear() just assume the writer is running
+        return self.worker.is_alive() if self._owner == os.getpid() else True
+
+    def __run(self):
+        slots, writes, latched = self.slots, self.writes, self.latched
+        n = self.n_slots
+        while self.running.value:
+            # A put() stores its pattern and count before releasing wake, so
+            # draining it before reading the slots can't lose a write
+            if not self.wake.acquire(timeout=0.5):
+                continue
+            while self.wake.acquire(False):     # one frame for every put() so far
+                pass
+            request = self.requested.value
+            # Read the counters before the slots: every write counted here
+            # is in the frame (a motor never has two unlatched writes)
+            counts = list(writes)
+            word = 0
+            for i in range(n):
+                word |= slots[i] << (4 * i)
+            self.s.shiftWord(word, self.nbits)
+            self.ticks.value += 1
+            for i in range(n):
+                latched[i] = counts[i]
+            self.served.value = request
@@ -0,0 +1,147 @@
+# planner.py
+#
+# Target ordering for auto_target_sequence.
+#
+# Both axes move at the same time (separate worker processes), so the time
+# to slew between two aims is set by whichever axis has further to go:
+#
+#     t = max(|d_azimuth|, |d_altitude|) * steps_per_degree * delay
+#
+# (a Chebyshev distance).  With an acceleration profile the time for the
+# longer axis' step count comes from the profile instead.  The azimuth axis
+# has hard limits rather than wrapping, so no shortest-way-around logic is
+# needed.
+#
+# Small fields are solved exactly (Held-Karp dynamic programming over
+# subsets, O(n^2 2^n)); bigger ones use nearest neighbour followed by 2-opt
+# improvement, which is fast and usually within a few percent.
+import math
+from stepper_class_shiftregister_multiprocessing import Stepper
+
+EXACT_LIMIT = 12      # largest field solved exactly (2^12 * 12^2 ~ 600k steps)
+
+
+def move_time(a, b, profile=None):
+    """Slew time between two (azimuth, altitude) aims in radians [s]"""
+    degrees = max(abs(math.degrees(a[0] - b[0])), abs(math.degrees(a[1] - b[1])))
+    if profile is not None:
+        return profile.duration(int(degrees * Stepper.steps_per_degree))
+    return degrees * Stepper.steps_per_degree * Stepper.delay / 1e6
+
+
+def sequence_time(start, aims, order, profile=None):
+    """Total slew time visiting aims in the given order, starting at start [s]"""
+    total = 0.0
+    here = start
+    for i in order:
+        total += move_time(here, aims[i], profile)
+        here = aims[i]
+    return total
+
+
+def _held_karp(start, aims, move_time):
+    n = len(aims)
+    cost = [[move_time(a, b) for b in aims] for a in aims]
+    # best[mask][j]: cheapest way to visit the set `mask` ending at j
+    best = [[math.inf] * n for _ in range(1 << n)]
+    parent = [[-1] * n for _ in range(1 << n)]
+    for j in range(n):
+        best[1 << j][j] = move_time(start, aims[j])
+
+    for mask in range(1, 1 << n):
+        row = best[mask]
+        for j in range(n):
+            here = row[j]
+            if here == math.inf:
+                continue
+            for k in range(n):
+                if mask & (1 << k):
+                    continue
+                nxt = mask | (1 << k)
+                t = here + cost[j][k]
+                if t < best[nxt][k]:
+                    best[nxt][k] = t
+                    parent[nxt][k] = j
+
+    full = (1 << n) - 1
+    last = min(range(n), key=lambda j: best[full][j])
+    order = []
+    mask = full
+    while last != -1:
+        order.append(last)
+        mask, last = mask & ~(1 << last), parent[mask][last]
+    return order[::-1]
+
+
+def _nearest_neighbour(start, aims, move_time):
+    remaining = set(range(len(aims)))
+    order = []
+    here = start
+    while remaining:
+        nxt = min(remaining, key=lambda i: move_time(here, aims[i]))
+        remaining.remove(nxt)
+        order.append(nxt)
+        here = aims[nxt]
+    return order
+
+
+def _two_opt(start, aims, order, move_time):
+    # Reverse segments while it shortens the (open) path.  Only the two
+    # edges at the ends of the reversed segment change, since the cost is
+    # symmetric.
+    points = [start] + [aims[i] for i in order]
+    idx = [None] + list(order)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, len(points) - 1):
+            for j in range(i + 1, len(points)):
+                before = move_time(points[i - 1], points[i])
+                after = move_time(points[i - 1], points[j])
+                if j + 1 < len(points):
+                    before += move_time(points[j], points[j + 1])
+                    after += move_time(points[i], points[j + 1])
+                if after < before - 1e-9:
+                    points[i:j + 1] = points[i:j + 1][::-1]
+                    idx[i:j + 1] = idx[i:j + 1][::-1]
+                    improved = True
+    return idx[1:]
+
+
+def plan_order(start, aims, exact_limit=EXACT_LIMIT, profile=None):
+    """
+    Order aims ((azimuth, altitude) tuples in radians) to minimise total
+    slew time from start.  Returns (order, estimated_slew_time) where order
+    is a list of indices into aims.  Pass the motors' Profile to cost
+    moves with acceleration ramps.
+    """
+    if not aims:
+        return [], 0.0
+    cost = lambda a, b: move_time(a, b, profile)
+    if len(aims) <= exact_limit:
+        order = _held_karp(start, aims, cost)
+    else:
+        order = _two_opt(start, aims, _nearest_neighbour(start, aims, cost), cost)
+    return order, sequence_time(start, aims, order, profile)
+
+
+if __name__ == '__main__':
+    # Compare against the default (globes first, then enemies) on the
+    # local positions.json
+    import time
+    from command import loadAims
+
+    aims = loadAims()
+
+    default = sequence_time((0.0, 0.0), aims, range(len(aims)))
+    t0 = time.perf_counter()
+    order, planned = plan_order((0.0, 0.0), aims)
+    elapsed = time.perf_counter() - t0
+    print(f"{len(aims)} targets")
+    print(f"dictionary order: {default:6.2f} s slewing")
+    print(f"planned order:    {planned:6.2f} s slewing ({elapsed*1000:.1f} ms to plan)")
+
+    small = aims[:10]
+    exact = plan_order((0.0, 0.0), small)[1]
+    heuristic = plan_order((0.0, 0.0), small, exact_limit=0)[1]
+    print(f"first 10 targets: exact {exact:.2f} s, heuristic {heuristic:.2f} s")
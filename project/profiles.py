@@ -0,0 +1,108 @@
+# profiles.py
+#
+# Step timing profiles for the 28BYJ-48 steppers.
+#
+# Starting from rest at anything much faster than 1.2 ms/step makes the
+# motor skip, but once it is turning it can cruise at 0.5-0.8 ms/step (see
+# Lab8/speed_analysis.py).  A profile turns a step count into a list of
+# per-step delays that start slow, ramp up to the cruise rate and ramp back
+# down before the end:
+#
+#   constant  - every step at start_delay (the old behaviour)
+#   trapezoid - constant acceleration: rate^2 grows linearly with steps
+#   scurve    - same ramp length, but the rate follows a smoothstep curve
+#               so the acceleration itself ramps in and out (less jerk)
+#
+# Delays are in microseconds, acceleration in steps/s^2.
+import math
+from functools import lru_cache
+
+
+class Profile:
+    def __init__(self, kind='constant', start_delay=1200, cruise_delay=None, accel=0.0):
+        if kind not in ('constant', 'trapezoid', 'scurve'):
+            raise ValueError(f"unknown profile kind: {kind}")
+        if kind != 'constant' and (cruise_delay is None or accel <= 0):
+            raise ValueError(f"{kind} profile needs cruise_delay and accel > 0")
+        self.kind = kind
+        self.start_delay = start_delay
+        self.cruise_delay = start_delay if cruise_delay is None else cruise_delay
+        self.accel = accel
+
+    @classmethod
+    def constant(cls, delay=1200):
+        return cls('constant', delay)
+
+    @classmethod
+    def trapezoid(cls, start_delay, cruise_delay, accel):
+        return cls('trapezoid', start_delay, cruise_delay, accel)
+
+    @classmethod
+    def scurve(cls, start_delay, cruise_delay, accel):
+        return cls('scurve', start_delay, cruise_delay, accel)
+
+    def __repr__(self):
+        if self.kind == 'constant':
+            return f"Profile.constant({self.start_delay})"
+        return f"Profile.{self.kind}({self.start_delay}, {self.cruise_delay}, {self.accel})"
+
+    def __eq__(self, other):
+        return isinstance(other, Profile) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def _key(self):
+        return (self.kind, self.start_delay, self.cruise_delay, self.accel)
+
+    def ramp_steps(self):
+        """Steps needed to accelerate from the start rate to the cruise rate"""
+        if self.kind == 'constant':
+            return 0
+        v0 = 1e6 / self.start_delay
+        v1 = 1e6 / self.cruise_delay
+        return max(0, math.ceil((v1 * v1 - v0 * v0) / (2 * self.accel)))
+
+    def delays(self, num_steps):
+        """Per-step delays [us] for a move of num_steps"""
+        return list(_delays(self, num_steps))
+
+    def duration(self, num_steps):
+        """Total time of a move of num_steps [s]"""
+        return _duration(self, num_steps)
+
+
+@lru_cache(maxsize=256)
+def _delays(profile, n):
+    if profile.kind == 'constant' or n == 0:
+        return (profile.start_delay,) * n
+
+    v0 = 1e6 / profile.start_delay
+    v1 = 1e6 / profile.cruise_delay
+    ramp = profile.ramp_steps()
+    out = []
+    for k in range(n):
+        # Distance to the nearer end of the move; short moves never reach
+        # cruise and just ramp up to the middle and back down
+        d = min(k, n - 1 - k)
+        if profile.kind == 'trapezoid':
+            v = min(v1, math.sqrt(v0 * v0 + 2 * profile.accel * d))
+        else:
+            x = min(1.0, d / ramp) if ramp else 1.0
+            v = v0 + (v1 - v0) * x * x * (3 - 2 * x)     # smoothstep
+        out.append(1e6 / v)
+    return tuple(out)
+
+
+@lru_cache(maxsize=4096)
+def _duration(profile, n):
+    return sum(_delays(profile, n)) / 1e6
+
+
+if __name__ == '__main__':
+    profiles = [Profile.constant(1200),
+                Profile.trapezoid(1200, 600, 4000),
+                Profile.scurve(1200, 600, 4000)]
+    print("steps | " + " | ".join(f"{repr(p):>34s}" for p in profiles))
+    for n in (50, 200, 500, 1024, 2048):
+        print(f"{n:5d} | " + " | ".join(f"{p.duration(n):33.3f}s" for p in profiles))
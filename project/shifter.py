@@ -1,14 +1,35 @@
 # Shift register class
+#
+# Every motor step goes through shiftWord, so it is kept lean:
+#  - a frame identical to the one last latched is not sent again (the last
+#    frame lives in shared memory, since Stepper workers in different
+#    processes share one register)
+#  - the GPIO calls for each byte are worked out once in __init__; the data
+#    pin is only written when the bit changes, and where the GPIO library
+#    takes lists of pins, "clock low" and "next data bit" go in one call
+#  - no sleep(0) between edges (GPIO calls on the Pi take ~1 us, far more
+#    than the 74HC595's ~20 ns setup/hold times)
+#  - zero padding only fills a partial last byte; the old code added one
+#    clock too many, which shifted straight out of the chain
+#
+# SPIShifter is a drop-in alternative that sends each frame as one spidev
+# transfer; make_shifter() picks the backend by name.
 
 try:
     from RPi import GPIO
 except (ImportError, RuntimeError):
     import mock_gpio as GPIO
 from time import sleep
+import multiprocessing
+import os
+try:
+    import spidev
+except ImportError:
+    spidev = None
 
 GPIO.setmode(GPIO.BCM)
 
-class Shifter(): 
+class Shifter():
 
     def __init__(self, data, clock, latch):
         self.dataPin = data
@@ -18,29 +39,166 @@ class Shifter():
         GPIO.setup(self.latchPin, GPIO.OUT)
         GPIO.setup(self.clockPin, GPIO.OUT)
 
+        # Can GPIO.output take lists of pins? (RPi.GPIO >= 0.5.8 can)
+        try:
+            GPIO.output([self.clockPin, self.dataPin], [0, 0])
+            self.multi = True
+        except (TypeError, ValueError):
+            GPIO.output(self.clockPin, 0)
+            GPIO.output(self.dataPin, 0)
+            self.multi = False
+
+        # Last latched word, its length and the data pin level, shared by
+        # every process using this register (-1 = unknown, always send)
+        self.state = multiprocessing.RawArray('q', [-1, 0, 0])
+        self.frames = multiprocessing.RawValue('q', 0)      # frames latched (for /api/metrics)
+        # calls[clock_high][level][byte] -> (GPIO.output args, data level after)
+        self.calls = [[[self.__byte_calls(byte, level, clock_high) for byte in range(256)]
+                       for level in (0, 1)] for clock_high in (False, True)]
+        if self.multi:
+            self.latch_calls = (([self.clockPin, self.latchPin], [0, 1]), (self.latchPin, 0))
+        else:
+            self.latch_calls = ((self.clockPin, 0), (self.latchPin, 1), (self.latchPin, 0))
+
+    # GPIO.output calls that clock out one byte LSB first, starting from the
+    # given data level with the clock low or (after a previous byte) high.
+    # The clock is left high; the next byte or the latch pulls it low.
+    def __byte_calls(self, byte, level, clock_high):
+        calls = []
+        for i in range(8):
+            bit = (byte >> i) & 1
+            if bit != level and clock_high and self.multi:
+                calls.append(([self.clockPin, self.dataPin], [0, bit]))
+            else:
+                if clock_high:
+                    calls.append((self.clockPin, 0))
+                if bit != level:
+                    calls.append((self.dataPin, bit))
+            level = bit
+            calls.append((self.clockPin, 1))
+            clock_high = True
+        return tuple(calls), level
+
     def ping(self, p):  # ping the clock or latch pin
         GPIO.output(p,1)
-        sleep(0)
         GPIO.output(p,0)
 
     # Shift all bits in an arbitrary-length word, allowing
     # multiple 8-bit shift registers to be chained (with overflow
     # of SR_n tied to input of SR_n+1):
     def shiftWord(self, dataword, num_bits):
-        for i in range((num_bits+1) % 8):  # Load bits short of a byte with 0
-            # self.dataPin.value(0)  # MicroPython for ESP32
-            GPIO.output(self.dataPin, 0) 
-            self.ping(self.clockPin)
-        for i in range(num_bits):          # Send the word
-            # self.dataPin.value(dataword & (1<<i))  # MicroPython for ESP32
-            GPIO.output(self.dataPin, dataword & (1<<i))
-            self.ping(self.clockPin)
-        self.ping(self.latchPin)
+        state = self.state
+        if state[0] == dataword and state[1] == num_bits:
+            return                                  # already latched
+        pad = -num_bits % 8                          # zeros to fill a partial last byte
+        word = dataword << pad
+        output = GPIO.output
+        level = state[2]
+        calls = self.calls[0][level]
+        for k in range((num_bits + pad) // 8):
+            byte_calls, level = calls[(word >> (8 * k)) & 0xff]
+            for args in byte_calls:
+                output(*args)
+            calls = self.calls[1][level]
+        for args in self.latch_calls:
+            output(*args)
+        state[0], state[1], state[2] = dataword, num_bits, level
+        self.frames.value += 1
 
     # Shift all bits in a single byte:
     def shiftByte(self, databyte):
         self.shiftWord(databyte, 8)
 
+    # Send the next frame even if it matches the last one (e.g. after
+    # something else has driven the pins)
+    def invalidate(self):
+        self.state[0] = -1
+
+
+# Bit-reversed value of every byte, for bytes.translate
+REVERSED = bytes(int(f"{b:08b}"[::-1], 2) for b in range(256))
+
+class SPIShifter():
+    """
+    Sends each frame in one SPI transfer instead of bit-banging the pins.
+
+    Wiring: MOSI (GPIO10) -> SER, SCLK (GPIO11) -> SRCLK, and RCLK to
+    either a GPIO pin (latch=) or the chip select CE<device> (latch=None:
+    chip select rises at the end of the transfer, which latches the frame).
+
+    The bit stream matches Shifter: padding first, then the word LSB first.
+    SPI sends bytes in order, MSB first, so bytes go low-order first and
+    each byte is bit-reversed.
+
+    device_path= sends frames to a file or pty instead of spidev (the raw
+    bytes that would appear on MOSI, one frame after another), for testing
+    without a Pi.
+    """
+
+    def __init__(self, bus=0, device=0, latch=None, speed_hz=1000000, device_path=None):
+        self.latchPin = latch
+        if latch is not None:
+            GPIO.setup(latch, GPIO.OUT)
+            GPIO.output(latch, 0)
+        self.spi = None
+        self.fd = None
+        if device_path is not None:
+            self.fd = os.open(device_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND | os.O_NOCTTY)
+            if os.isatty(self.fd):
+                import tty
+                tty.setraw(self.fd)       # no newline translation on a pty
+        elif spidev is None:
+            raise RuntimeError("spidev is not installed (pip install spidev), "
+                               "use the gpio backend or device_path=")
+        else:
+            self.spi = spidev.SpiDev()
+            self.spi.open(bus, device)
+            self.spi.mode = 0             # 74HC595 samples on the rising clock edge
+            self.spi.max_speed_hz = speed_hz
+        self.state = multiprocessing.RawArray('q', [-1, 0])   # last word, length (shared)
+        self.frames = multiprocessing.RawValue('q', 0)      # frames latched (for /api/metrics)
+
+    def frame(self, dataword, num_bits):
+        """Bytes sent on MOSI for one word"""
+        pad = -num_bits % 8
+        nbytes = (num_bits + pad) // 8
+        return (dataword << pad).to_bytes(nbytes, 'little').translate(REVERSED)
+
+    def shiftWord(self, dataword, num_bits):
+        state = self.state
+        if state[0] == dataword and state[1] == num_bits:
+            return                                  # already latched
+        frame = self.frame(dataword, num_bits)
+        if self.spi is not None:
+            self.spi.writebytes2(frame)
+        else:
+            os.write(self.fd, frame)
+        if self.latchPin is not None:
+            GPIO.output(self.latchPin, 1)
+            GPIO.output(self.latchPin, 0)
+        state[0], state[1] = dataword, num_bits
+        self.frames.value += 1
+
+    def shiftByte(self, databyte):
+        self.shiftWord(databyte, 8)
+
+    def invalidate(self):
+        self.state[0] = -1
+
+    def close(self):
+        if self.spi is not None:
+            self.spi.close()
+        if self.fd is not None:
+            os.close(self.fd)
+
+
+def make_shifter(backend='gpio', **kwargs):
+    """Shift register for the named backend ('gpio' or 'spi'); kwargs go to its constructor"""
+    backends = {'gpio': Shifter, 'spi': SPIShifter}
+    if backend not in backends:
+        raise ValueError(f"unknown shifter backend: {backend}")
+    return backends[backend](**kwargs)
+
 
 if __name__ == '__main__':
     # Example - only runs when executing shifter.py directly
@@ -10,8 +10,40 @@ try:
 except (ImportError, RuntimeError):
     import mock_gpio as GPIO
 import time
+import queue
+import threading
 import multiprocessing
 from shifter import Shifter   # our custom Shifter class
+from profiles import Profile
+from timing import wait_until, JitterHistogram
+from waveform import compile_move, compile_paced, compile_rotation
+
+
+class Move:
+    """
+    Handle for one queued Stepper command (returned by rotate/goAngle/off).
+
+    The worker process publishes the sequence number of the last command it
+    finished, so wait() returns as soon as the motor is really done instead
+    of sleeping for an estimated time.
+    """
+
+    def __init__(self, stepper, seq):
+        self.stepper = stepper
+        self.seq = seq
+
+    def done(self):
+        return self.stepper.done_seq.value >= self.seq
+
+    def cancelled(self):
+        """True once the command has been cancelled or cut short by abort()
+        (outcomes are kept for the last Stepper.outcomes_kept commands)"""
+        return self.done() and bool(self.stepper.outcomes[self.seq % Stepper.outcomes_kept])
+
+    def wait(self, timeout=None):
+        """Block until the command has finished; returns False on timeout"""
+        with self.stepper.done_cond:
+            return self.stepper.done_cond.wait_for(self.done, timeout)
 
 class Stepper:
     """
@@ -33,94 +65,365 @@ class Stepper:
     An instance attribute (shifter_bit_start) tracks the bit position
     in the shift register where the 4 control bits for each motor
     begin.
+
+    Moves follow the motor's step timing profile (profiles.Profile); the
+    default is a constant Stepper.delay between steps.  Jogging always
+    uses Stepper.delay scaled by the jog velocity.  Steps are paced against
+    absolute deadlines (timing.wait_until) so the time spent stepping does
+    not add to the delay; the deviation of every step interval is kept in
+    the shared jitter histogram.  The coil patterns and deadlines of each
+    move are compiled once (waveform.py) and the worker plays them back.
+
+    With an output.OutputWriter (output=) each motor only publishes its
+    coil pattern to its own slot and the writer process latches the
+    frames, instead of every step locking shifter_outputs and shifting a
+    whole frame itself.  With a telemetry.TelemetryRing (telemetry=) the
+    worker also logs a (time, step count, coil pattern) record per step.
     """
 
     # Class attributes:
     num_steppers = 0      # track number of Steppers instantiated
     shifter_outputs = multiprocessing.Value('i',0)   # track shift register outputs for all motors
-    seq = [0b0001,0b0011,0b0010,0b0110,0b0100,0b1100,0b1000,0b1001] # CCW sequence
+    seq = [0b0001,0b0011,0b0010,0b0110,0b0100,0b1100,0b1000,0b1001] # CCW sequence (also waveform.SEQ)
     delay = 1200          # delay between motor steps [us]
     # delay = 500000            # for sanity check of step sequence
-    steps_per_degree = 4096/360    # 4096 steps/rev * 1/360 rev/deg
+    steps_per_rev = 4096
+    steps_per_degree = steps_per_rev/360    # 4096 steps/rev * 1/360 rev/deg
+    min_jog = 0.01        # jog speeds below 1% of full speed count as stopped
+    jog_chunk = 0.02      # jog velocity is re-read every 20 ms of stepping [s]
+    coalesce = True       # merge commands that queued up while the motor was busy
+    outcomes_kept = 1024  # commands whose outcome (done/cancelled) Move.cancelled() can look up
 
-    def __init__(self, shifter, lock):
+    def __init__(self, shifter, lock, profile=None, output=None, telemetry=None, continuous=True):
         self.s = shifter           # shift register
-        self.angle = multiprocessing.Value('d',0.0) # current motor angle as shared double
+        # continuous: the axis can turn round and round, so goAngle() takes
+        # the shortest way and position() wraps.  An axis with hard stops
+        # (continuous=False) moves to the absolute step target instead.
+        self.continuous = continuous
+        self.profile = profile or Profile.constant(Stepper.delay)   # step timing for moves
+        # Position: signed step count, written only by the worker (one store
+        # per step, no lock); angles are worked out from it when read.
+        # zero() moves the reference point instead of touching the count.
+        self.counter = multiprocessing.RawValue('l', 0)
+        self.zero_offset = multiprocessing.RawValue('l', 0)   # counter value at zero()
         self.step_state = 0        # track position in sequence
-        self.shifter_bit_start = 4*Stepper.num_steppers  # starting bit position
+        self.output = output       # output.OutputWriter, or None to write the register directly
+        if output is not None:
+            self.slot = output.attach()
+            self.shifter_bit_start = 4*self.slot
+        else:
+            self.shifter_bit_start = 4*Stepper.num_steppers  # starting bit position
         self.lock = lock           # multiprocessing lock
         Stepper.num_steppers += 1   # increment the instance count
+        self.telemetry = telemetry # telemetry.TelemetryRing for per-step records, or None
 
         self.queue = multiprocessing.Queue()        # creates queue system for multiple rotate commands
+        # Completion signalling: commands are numbered in the main process and
+        # the worker publishes the number of the last one it finished
+        self.done_seq = multiprocessing.RawValue('l', 0)   # guarded by done_cond
+        self.done_cond = multiprocessing.Condition()
+        self._seq = 0
+        self._seq_lock = threading.Lock()
+        # Jog mode: signed fraction of full speed (1.0 = one step per delay),
+        # read by the worker on every step so changes need no queue round trip
+        self.jog_velocity = multiprocessing.RawValue('d', 0.0)
+        # Soft limit for jogging: the worker never steps past +-jog_limit
+        # steps from zero (0 = no limit)
+        self.jog_limit = multiprocessing.RawValue('l', 0)
+        self._jogging = False      # main-process view: a jog command is active
+        self.jitter = JitterHistogram()    # step interval error, shared with the worker
+        self._last_step = None     # worker only: (time, planned delay) of the last step
+        self.coalesced = multiprocessing.RawValue('l', 0)  # commands merged away by the worker
+        self.executed = multiprocessing.RawValue('l', 0)   # commands actually carried out
+        self.step_count = multiprocessing.RawValue('l', 0) # steps output (worker only writes)
+        self.missed = multiprocessing.RawValue('l', 0)     # steps more than a step period late
+        # Emergency stop: every command numbered up to abort_seq is cancelled,
+        # including the one running (checked before every step)
+        self.abort_seq = multiprocessing.RawValue('l', 0)
+        # Per command (by seq % outcomes_kept): 1 if it was cancelled, set
+        # by the worker before the command is signalled done
+        self.outcomes = multiprocessing.RawArray('b', Stepper.outcomes_kept)
+        self._active = 0           # worker only: seq of the command being carried out
         self.worker = multiprocessing.Process(target=self.__worker_loop)
         self.worker.daemon = True
         self.worker.start()
 
-    # Signum function:
-    def __sgn(self, x):
-        if x == 0: return(0)
-        else: return(int(abs(x)/x))
-
-    # Move a single +/-1 step in the motor sequence:
-    def __step(self, dir):
-        self.step_state += dir    # increment/decrement the step
-        self.step_state %= 8      # ensure result stays in [0,7]
-        
-        with Stepper.shifter_outputs.get_lock():                 # requires lock on outputs
-            current_output = Stepper.shifter_outputs.value       # copies old outputs
-            mask = 0b1111 << self.shifter_bit_start              # write 1s for this motor
-            new_output = (current_output & ~mask) | (Stepper.seq[self.step_state] << self.shifter_bit_start)       # clear the bits for this motor
-            Stepper.shifter_outputs.value = new_output           # copy the new output to shared variable
-            self.s.shiftByte(Stepper.shifter_outputs.value)      # execute the output to shift register
-            
-        with self.angle.get_lock():                              # require lock on angle for this motor
-            self.angle.value += dir/Stepper.steps_per_degree
-            self.angle.value %= 360         # limit to [0,359.9+] range
+    # Output a compiled move (waveform.compile_move): step k is due at
+    # start + move.times[k].  Returns when the step after the last one is
+    # due, without waiting for it, so moves can be chained.  If the worker
+    # falls more than a whole step behind (e.g. descheduled) the rest of the
+    # schedule slides instead of bursting steps to catch up, which would
+    # make the motor skip.  An abort stops it before the next step; the
+    # step count and coil phase then reflect the steps actually taken.
+    def __play(self, move, start):
+        outputs = Stepper.shifter_outputs
+        shift = self.shifter_bit_start
+        keep = ~(0b1111 << shift)
+        writer = self.output
+        ring = self.telemetry
+        counter = self.counter
+        times = move.times
+        abort, active = self.abort_seq, self._active
+        for k, nibble in enumerate(move.nibbles):
+            due = start + times[k]
+            late = wait_until(due)
+            if abort.value >= active:
+                self.step_state = (move.end_phase - move.direction*(move.steps - k)) % 8
+                return time.perf_counter()
+            planned = times[k + 1] - times[k]
+            if late > planned:
+                start += late
+                self.missed.value += 1
+            now = due + late
+            if self._last_step is not None:
+                last, last_planned = self._last_step
+                self.jitter.record((now - last - last_planned)*1e6)
+            self._last_step = (now, planned)
+
+            if writer is not None:
+                writer.put(self.slot, nibble)                    # latched by the writer process
+            else:
+                with outputs.get_lock():                         # requires lock on outputs
+                    new_output = (outputs.value & keep) | (nibble << shift)
+                    outputs.value = new_output
+                    self.s.shiftByte(new_output)
+            counter.value += move.direction
+            self.step_count.value += 1
+            if ring is not None:
+                ring.append(time.perf_counter_ns(), counter.value, nibble)
+        self.step_state = move.end_phase
+        return start + times[-1]
 
     # Move relative angle from current position:
     def __rotate(self, delta):
         with self.lock:                        # require lock for this motor
-            numSteps = int(Stepper.steps_per_degree * abs(delta))    # find the right # of steps
-            dir = self.__sgn(delta)        # find the direction (+/-1)
-            for s in range(numSteps):      # take the steps
-                self.__step(dir)
-                time.sleep(Stepper.delay/1e6)
+            move = compile_rotation(delta, self.profile, self.step_state, Stepper.steps_per_degree)
+            wait_until(self.__play(move, time.perf_counter()))
+
+    # Move a signed number of whole steps, paced like a pace-step move if
+    # that is longer, starting at start_at (time.perf_counter()) if given:
+    def __move_steps(self, steps, pace=None, start_at=None):
+        with self.lock:
+            direction = 1 if steps > 0 else -1
+            if steps and pace and pace > abs(steps):
+                move = compile_paced(abs(steps), direction, self.profile, self.step_state, pace)
+            else:
+                move = compile_move(abs(steps), direction, self.profile, self.step_state)
+            now = time.perf_counter()
+            wait_until(self.__play(move, now if start_at is None else max(start_at, now)))
+
+    # Step continuously at the shared jog velocity until it drops to zero or
+    # another command is queued.  Steps go out in compiled chunks of about
+    # jog_chunk seconds, with the velocity rounded to 1% so chunks come
+    # from the cache.  A chunk is cut short at the jog limit, and the motor
+    # holds there until the velocity turns back or the jog ends:
+    def __jog(self):
+        with self.lock:
+            due = time.perf_counter()
+            while self.queue.empty() and self.abort_seq.value < self._active:
+                v = round(self.jog_velocity.value, 2)
+                if abs(v) < Stepper.min_jog:
+                    break
+                direction = 1 if v > 0 else -1
+                delay = round(Stepper.delay / min(abs(v), 1.0))
+                steps = max(1, int(Stepper.jog_chunk * 1e6 / delay))
+                limit = self.jog_limit.value
+                if limit:
+                    steps = min(steps, limit - direction*self.steps())
+                    if steps <= 0:
+                        self._last_step = None          # holding isn't step jitter
+                        due = max(due, time.perf_counter()) + Stepper.jog_chunk
+                        wait_until(due)
+                        continue
+                move = compile_move(steps, direction, Profile.constant(delay), self.step_state)
+                due = self.__play(move, due)
+            wait_until(due)
+
+    # Merge a run of queued commands into the ones worth carrying out, as
+    # (seq, kind, arg) where seq is the last command each one stands for:
+    # consecutive relative moves add up, an absolute target (goto) replaces
+    # the motion queued before it (latest wins) and later relative moves
+    # offset it, anything queued after a jog ends the jog, and repeated
+    # offs collapse.  An off between moves is kept as a barrier.
+    @staticmethod
+    def _coalesce(commands):
+        actions = []
+        for seq, kind, arg in commands:
+            prev = actions[-1][1] if actions else None
+            if kind == 'rotate' and prev == 'rotate':
+                actions[-1] = (seq, prev, actions[-1][2] + arg)
+            elif kind == 'rotate' and prev == 'goto':      # no longer paced with another axis
+                actions[-1] = (seq, prev, (actions[-1][2][0] + arg, None, None))
+            elif prev == 'jog' or (kind == 'goto' and prev in ('rotate', 'goto')) \
+                    or (kind == 'off' and prev == 'off'):
+                actions[-1] = (seq, kind, arg)
+            else:
+                actions.append((seq, kind, arg))
+        return actions
 
     def __worker_loop(self):                # constantly looks for new commands from main code
         while True:
-            cmd = self.queue.get()
-            if cmd is None:
-                # Off command - must hold lock during entire shift operation
-                # to prevent race with other motor's off command
-                with Stepper.shifter_outputs.get_lock():
-                    Stepper.shifter_outputs.value = 0
-                    self.s.shiftByte(0)
-            else:
-                self.__rotate(cmd)
+            commands = [self.queue.get()]
+            if Stepper.coalesce:
+                while True:                     # take everything that queued up meanwhile
+                    try:
+                        commands.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+            # Drop cancelled commands before merging, so they can't ride
+            # along in a move queued after the abort
+            cut = self.abort_seq.value
+            for seq, kind, arg in commands:
+                if seq <= cut:
+                    self.outcomes[seq % Stepper.outcomes_kept] = 1
+            cancelled = [(seq, 'cancelled', None) for seq, kind, arg in commands if seq <= cut][-1:]
+            commands = [c for c in commands if c[0] > cut]
+            waiting = [seq for seq, kind, arg in commands]     # every seq, merged or not
+            if Stepper.coalesce:
+                merged = self._coalesce(commands)
+                self.coalesced.value += len(commands) - len(merged)
+                commands = merged
+            for seq, kind, arg in cancelled + commands:
+                if seq > self.abort_seq.value:      # (may be cancelled while waiting its turn)
+                    self._active = seq
+                    self.__execute(kind, arg)
+                    self.executed.value += 1
+                # Merged commands share the outcome of the one standing for them
+                outcome = int(self.abort_seq.value >= seq)
+                while waiting and waiting[0] <= seq:
+                    self.outcomes[waiting.pop(0) % Stepper.outcomes_kept] = outcome
+                with self.done_cond:            # signal completion to any waiters
+                    self.done_seq.value = seq
+                    self.done_cond.notify_all()
+
+    def __execute(self, kind, arg):
+        self._last_step = None              # don't count idle time as jitter
+        if kind == 'off' and self.output is not None:
+            self.output.put(self.slot, 0)   # only this motor: another may still be stepping
+        elif kind == 'off':
+            # Off command - must hold lock during entire shift operation
+            # to prevent race with other motor's off command
+            with Stepper.shifter_outputs.get_lock():
+                Stepper.shifter_outputs.value = 0
+                self.s.shiftByte(0)
+        elif kind == 'jog':
+            self.__jog()
+        elif kind == 'goto':
+            # Nearest whole step to the target (the shortest way round on a
+            # continuous axis), resolved when the move actually starts
+            target, pace, start_at = arg
+            self.__move_steps(self.steps_to(target), pace, start_at)
+        else:
+            self.__rotate(arg)
+
+    def __submit(self, kind, arg=None):
+        with self._seq_lock:                    # numbering must match queue order
+            self._seq += 1
+            self.queue.put((self._seq, kind, arg))
+            return Move(self, self._seq)
             
     # Move relative angle from current position:
     def rotate(self, delta):
-        self.queue.put(delta)    # adds rotation command to a queue
+        self._jogging = False          # a queued command ends any jog
+        return self.__submit('rotate', delta)    # adds rotation command to a queue
     
     # Turn off this motor's coils (queued so it happens after pending moves)
     def off(self):
-        self.queue.put(None)
+        self._jogging = False
+        return self.__submit('off')
+
+    # Keep stepping at a signed fraction of full speed (fractional values
+    # for analog input) until jog(0) or another command.  Changing the speed
+    # of a running jog only updates shared memory.  With a limit [deg] the
+    # worker stops the motor that far from zero, checked against the step
+    # count before every chunk.  Returns the handle of the jog command,
+    # which completes once the motor has stopped.
+    def jog(self, velocity, limit=None):
+        velocity = max(-1.0, min(1.0, velocity))
+        if abs(velocity) < Stepper.min_jog:
+            velocity = 0.0
+        self.jog_limit.value = round(limit * Stepper.steps_per_degree) if limit else 0
+        self.jog_velocity.value = velocity
+        if velocity == 0:
+            self._jogging = False
+            return None
+        if not self._jogging:
+            self._jogging = True
+            self._jog_move = self.__submit('jog')
+        return self._jog_move
 
-    # Move to an absolute angle taking the shortest possible path:
-    def goAngle(self, target_angle):
-        with self.angle.get_lock():
-            current_angle = self.angle.value
-        delta = (target_angle - current_angle) % 360 # finds angle between 0 and 360
-        if delta > 180:        # if greater than 180, make it a negative angle between -180 and 0
-            delta -= 360
-        self.rotate(delta)    # add rotation to the queue
+    # Emergency stop: cancel every command queued so far, interrupting the
+    # one in progress before its next step, then turn the coils off.  Returns
+    # the handle of the off command, which completes once the motor has
+    # stopped and been de-energized; commands queued after this run normally.
+    def abort(self):
+        with self._seq_lock:                    # nothing can be queued in between
+            self.jog_velocity.value = 0.0
+            self._jogging = False
+            self.abort_seq.value = self._seq
+            self._seq += 1
+            self.queue.put((self._seq, 'off', None))
+            return Move(self, self._seq)
+
+    # Commands submitted but not finished yet (including merged ones):
+    def queue_depth(self):
+        return self._seq - self.done_seq.value
+
+    def stats(self):
+        return {'queued': self.queue_depth(), 'coalesced': self.coalesced.value,
+                'executed': self.executed.value, 'steps': self.step_count.value,
+                'missed': self.missed.value}
+
+    # Block until every command queued so far has finished:
+    def wait_idle(self, timeout=None):
+        with self._seq_lock:
+            last = Move(self, self._seq)
+        return last.wait(timeout)
+
+    # Move to an absolute angle taking the shortest possible path (on a
+    # continuous axis; otherwise straight to that angle from zero):
+    # The worker works out the delta when it gets to this command, and a
+    # newer target replaces queued moves that haven't started yet.  For a
+    # coordinated move of several axes, pace is the step count of the
+    # longest one (this move's steps are spread over its step times, so
+    # they arrive together) and start_at the time.perf_counter() all of
+    # them start at.
+    def goAngle(self, target_angle, pace=None, start_at=None):
+        self._jogging = False
+        if self.continuous:
+            target_angle %= 360
+        return self.__submit('goto', (target_angle, pace, start_at))    # add the target to the queue
 
          # COMPLETE THIS METHOD FOR LAB 8
 
+    # Steps from the zero point (signed, not wrapped), read back from the
+    # worker's shared counter:
+    def steps(self):
+        return self.counter.value - self.zero_offset.value
+
+    # Signed steps from here to an absolute angle, the way goAngle() goes:
+    def steps_to(self, target_angle):
+        delta = round(target_angle * Stepper.steps_per_degree) - self.steps()
+        if self.continuous:
+            rev = Stepper.steps_per_rev
+            delta %= rev
+            if delta > rev // 2:
+                delta -= rev
+        return delta
+
+    # Current angle in degrees, signed to (-180, 180] on a continuous axis:
+    def position(self):
+        steps = self.steps()
+        if self.continuous:
+            rev = Stepper.steps_per_rev
+            steps %= rev
+            if steps > rev // 2:
+                steps -= rev
+        return steps / Stepper.steps_per_degree
+
     # Set the motor zero point
-    def zero(self):                        # set the shared angle for this motor to 0
-        with self.angle.get_lock():
-            self.angle.value = 0.0
+    def zero(self):                        # the current position becomes 0
+        self.zero_offset.value = self.counter.value
         self.step_state = 0
 
 
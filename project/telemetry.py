@@ -0,0 +1,107 @@
+# telemetry.py
+#
+# Per-motor motion history in shared memory.
+#
+# Each Stepper worker appends one (timestamp, step count, coil pattern)
+# record per step to its own TelemetryRing, a fixed-size ring buffer in a
+# multiprocessing.shared_memory block:
+#
+#   header:  records written so far (int64), capacity (int64)
+#   records: t_ns (int64, time.perf_counter_ns), steps (int64, signed step
+#            count since the worker started), coil (uint8) + padding
+#
+# There is a single writer per ring and no lock: the writer fills in a
+# record and then bumps the count, and readers check the count again after
+# copying so they can throw away records that were overwritten meanwhile.
+# Other processes (test tools) can attach to a ring by its name.
+#
+# TelemetryBroadcaster streams new records from a set of rings as SSE
+# 'telemetry' frames (the /api/telemetry endpoint).
+import struct
+import time
+from multiprocessing import shared_memory
+
+from broadcast import Broadcaster, sse_frame
+
+HEADER = struct.Struct('<qq')
+RECORD = struct.Struct('<qqB7x')
+
+
+class TelemetryRing:
+    def __init__(self, capacity=4096, name=None):
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=HEADER.size + capacity * RECORD.size)
+            HEADER.pack_into(self.shm.buf, 0, 0, capacity)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.capacity = HEADER.unpack_from(self.shm.buf, 0)[1]
+
+    def append(self, t_ns, steps, coil):
+        """Add one record (worker process only)"""
+        buf = self.shm.buf
+        n = HEADER.unpack_from(buf, 0)[0]
+        RECORD.pack_into(buf, HEADER.size + (n % self.capacity) * RECORD.size, t_ns, steps, coil)
+        HEADER.pack_into(buf, 0, n + 1, self.capacity)
+
+    def written(self):
+        return HEADER.unpack_from(self.shm.buf, 0)[0]
+
+    def read(self, since=0):
+        """
+        Records written since the cursor `since`, oldest first, as
+        (records, cursor) where cursor is passed back in next time.  If the
+        ring wrapped in between, the oldest records are missing.
+        """
+        buf = self.shm.buf
+        if buf is None:
+            return [], since        # closed (shutting down)
+        n = self.written()
+        first = max(since, n - self.capacity)
+        records = [RECORD.unpack_from(buf, HEADER.size + (i % self.capacity) * RECORD.size)
+                   for i in range(first, n)]
+        # The writer may have lapped us while copying; its current record
+        # slot is the one after the last completed record
+        safe = self.written() - self.capacity + 1
+        if safe > first:
+            records = records[safe - first:]
+        return records, n
+
+    def close(self):
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+class TelemetryBroadcaster(Broadcaster):
+    """
+    Publishes one 'telemetry' frame per poll with the new records of every
+    ring: {"now_ns": ..., "<name>": [[t_ns, steps, coil], ...], ...}.
+    now_ns is the server's perf_counter_ns, for relating the timestamps.
+    """
+
+    def __init__(self, rings, interval=0.05, keepalive=15.0):
+        super().__init__(interval, keepalive)
+        self.rings = rings
+        self.cursors = {name: ring.written() for name, ring in rings.items()}
+
+    def add(self, name, ring):
+        """Start streaming another ring (from its current position)"""
+        with self.lock:
+            self.cursors[name] = ring.written()
+            self.rings[name] = ring
+
+    def poll(self):
+        with self.lock:
+            payload = {}
+            for name, ring in self.rings.items():
+                records, self.cursors[name] = ring.read(self.cursors[name])
+                if records:
+                    payload[name] = records
+            if not payload:
+                return
+            payload['now_ns'] = time.perf_counter_ns()
+            frame = sse_frame('telemetry', payload)
+            self.frames_built += 1
+        self.publish(frame)
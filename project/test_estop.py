@@ -0,0 +1,112 @@
+"""
+Emergency stop: Stepper.abort() on two motors sharing an OutputWriter, as
+TurretState sets them up, checked against the coil frames the recording
+mock_gpio decodes at the pins.
+
+    python3 -m pytest -q test_estop.py
+"""
+import multiprocessing
+import random
+import time
+
+import pytest
+
+import shifter
+from bench_estop import DATA, LATCH, CLOCK, pin_steps
+from output import OutputWriter
+from profiles import Profile
+from shifter import Shifter
+from stepper_class_shiftregister_multiprocessing import Stepper
+
+# Allowed time from abort() to the last coil change, on top of one step
+# period: a step that was already due can still be latched, and the writer
+# process has to wake up for it
+SLACK = 0.005   # [s]
+
+pytestmark = pytest.mark.skipif(shifter.GPIO.__name__ != 'mock_gpio',
+                                reason="needs the recording mock_gpio (run off the Pi)")
+
+
+@pytest.fixture(scope='module')
+def turret():
+    s = Shifter(data=DATA, latch=LATCH, clock=CLOCK)
+    writer = OutputWriter(s, n_slots=2)
+    profile = Profile.trapezoid(Stepper.delay, 600, 4000)
+    motors = [Stepper(s, multiprocessing.Lock(), profile, writer) for _ in range(2)]
+    for m in motors:                    # energize the coils so the trace starts on a known phase
+        m.rotate(1).wait()
+        m.goAngle(0).wait()
+    yield motors, writer
+    for m in motors:
+        m.worker.terminate()
+    writer.stop()
+
+
+def abort_midway(motors, writer):
+    """Start a 180 degree move on both motors and abort it part way.
+    Returns (abort time [ns], latched frames, steps() before the move)"""
+    shifter.GPIO.clear()
+    writer.s.invalidate()               # the trace starts with a full frame
+    writer.sync()
+    before = [m.steps() for m in motors]
+    for m in motors:
+        m.rotate(180)
+    time.sleep(random.uniform(0.15, 0.4))
+    t_abort = time.perf_counter_ns()
+    stops = [m.abort() for m in motors]
+    for stop in stops:
+        assert stop.wait(2.0)
+    writer.sync()
+    assert shifter.GPIO.dropped() == 0
+    return t_abort, shifter.GPIO.frames(DATA, CLOCK, LATCH), before
+
+
+def return_to_zero(motors):
+    for m in motors:
+        m.goAngle(0).wait(5.0)
+
+
+def test_last_step_within_a_step_period(turret):
+    motors, writer = turret
+    for _ in range(5):
+        t_abort, frames, _ = abort_midway(motors, writer)
+        changes = [t for (t, word), (_, prev) in zip(frames[1:], frames)
+                   if t >= t_abort and word and word != prev]
+        last_step = (max(changes) - t_abort) / 1e9 if changes else 0.0
+        assert last_step <= Stepper.delay / 1e6 + SLACK
+        assert frames[-1][1] == 0, "coils left energized"
+        return_to_zero(motors)
+
+
+def test_position_matches_pins(turret):
+    motors, writer = turret
+    for _ in range(5):
+        _, frames, before = abort_midway(motors, writer)
+        for slot, m in enumerate(motors):
+            moved = m.steps() - before[slot]
+            assert 0 < moved < 180 * Stepper.steps_per_degree
+            assert moved == pin_steps(frames, slot)
+            assert m.position() == pytest.approx(m.steps() / Stepper.steps_per_degree)
+        return_to_zero(motors)
+
+
+def test_queued_moves_report_cancelled(turret):
+    motors, writer = turret
+    m = motors[0]
+    finished = m.rotate(1)
+    assert finished.wait(2.0)
+    running = m.rotate(90)
+    queued = [m.rotate(90), m.goAngle(45), m.rotate(-30)]
+    time.sleep(0.1)
+    stop = m.abort()
+    assert stop.wait(2.0)
+    assert all(move.done() for move in [running] + queued)
+    assert running.cancelled()
+    assert all(move.cancelled() for move in queued)
+    assert not finished.cancelled()
+    assert not stop.cancelled()
+
+    after = m.rotate(1)                 # commands queued after the abort run normally
+    assert after.wait(2.0)
+    assert not after.cancelled()
+    return_to_zero(motors)
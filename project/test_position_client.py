@@ -0,0 +1,93 @@
+"""
+command.PositionClient against bench_positions' local stand-in for the
+field server (ETag / Last-Modified, 304 for conditional requests).
+
+    python3 -m pytest -q test_position_client.py
+"""
+import socket
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('requests')
+
+import command
+from bench_positions import FieldServer
+from command import PositionClient
+
+FIELD = {'turrets': {'13': {'r': 300.0, 'theta': 0.5}}, 'globes': []}
+
+
+@pytest.fixture
+def server():
+    server = FieldServer(FIELD, connect=0.0, rtt=0.0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def closed_url():
+    with socket.socket() as s:          # a port nothing listens on
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    return f'http://127.0.0.1:{port}/positions.json'
+
+
+def test_refresh_sends_validators(server):
+    client = PositionClient(server.url)
+    assert client.refresh()
+    assert 'If-None-Match' not in server.last_headers
+    assert client.refresh()
+    assert server.last_headers['If-None-Match'] == server.etag
+    assert server.last_headers['If-Modified-Since'] == server.modified
+    client.stop()
+
+
+def test_not_modified_keeps_data(server):
+    updates = []
+    client = PositionClient(server.url, on_update=updates.append)
+    assert client.refresh()
+    data = client.data
+    assert client.refresh()
+    assert client.not_modified == 1
+    assert client.data is data
+    assert updates == [FIELD]           # only the first, full response
+
+    changed = dict(FIELD, globes=[{'r': 100.0, 'theta': 1.0, 'z': 20.0}])
+    server.set_data(changed)
+    assert client.refresh()
+    assert updates == [FIELD, changed]
+    client.stop()
+
+
+def test_get_serves_stale_while_revalidating(server):
+    server.rtt = 0.3                    # a slow field server
+    stale = {'turrets': {}, 'globes': []}
+    client = PositionClient(server.url, interval=10.0, data=stale)
+    t = time.perf_counter()
+    assert client.get() is stale        # at once, refresh started in the background
+    assert time.perf_counter() - t < server.rtt / 2
+    end = time.perf_counter() + 5.0
+    while client.data is stale and time.perf_counter() < end:
+        time.sleep(0.01)
+    assert client.data == FIELD
+    assert client.get() == FIELD        # fresh now: no new request
+    time.sleep(server.rtt + 0.1)
+    assert client.requests == 1
+    client.stop()
+
+
+def test_falls_back_to_local_file(closed_url):
+    client = PositionClient(closed_url, timeout=0.5)
+    assert client.get() == command.loadLocal()
+    assert client.errors == 1
+    assert client.age() is None         # never confirmed by the server
+
+
+def test_failed_refresh_keeps_cache(closed_url):
+    client = PositionClient(closed_url, timeout=0.5, data=FIELD)
+    assert not client.refresh()
+    assert client.data is FIELD
@@ -0,0 +1,100 @@
+# timing.py
+#
+# Step timing helpers for the stepper worker processes.
+#
+# Sleeping for the step delay after every step makes the real period
+# delay + (lock, shiftByte and angle update time) + sleep overshoot, so
+# moves run slow and the error grows with load.  Instead the worker keeps
+# an absolute deadline for each step (time.perf_counter, monotonic) and
+# waits for it with wait_until(): a normal sleep for most of the wait, then
+# a short busy-wait for the last SPIN_WINDOW seconds, since sleep() on the
+# Pi often overshoots by 100 us or more.  Per-step work then only eats into
+# the wait instead of adding to it.
+#
+# JitterHistogram records how far each step interval was from the planned
+# one.  Counts live in shared memory so the main process can read the
+# statistics of a worker while it runs.
+import time
+import multiprocessing
+
+SPIN_WINDOW = 200e-6   # busy-wait the last 200 us of every wait [s]
+
+
+def wait_until(deadline):
+    """
+    Wait until time.perf_counter() reaches deadline.  Returns how late we
+    woke up [s] (never negative).
+    """
+    remaining = deadline - time.perf_counter()
+    if remaining > SPIN_WINDOW:
+        time.sleep(remaining - SPIN_WINDOW)
+    now = time.perf_counter()
+    while now < deadline:
+        now = time.perf_counter()
+    return now - deadline
+
+
+class JitterHistogram:
+    """
+    Histogram of |actual - planned| step interval in microseconds.
+
+    BINS are the upper bin edges; the last bin counts everything above
+    BINS[-1].  Only the worker process writes, so updates are unlocked; a
+    reader may see a step counted in one field but not yet in another.
+    """
+
+    BINS = (10, 25, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self):
+        self.counts = multiprocessing.RawArray('l', len(self.BINS) + 1)
+        self.stats = multiprocessing.RawArray('d', 3)    # steps, sum, max [us]
+
+    def record(self, error_us):
+        error_us = abs(error_us)
+        i = 0
+        while i < len(self.BINS) and error_us > self.BINS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.stats[0] += 1
+        self.stats[1] += error_us
+        if error_us > self.stats[2]:
+            self.stats[2] = error_us
+
+    def reset(self):
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        for i in range(len(self.stats)):
+            self.stats[i] = 0.0
+
+    def percentile(self, p):
+        """Upper bin edge containing the p-th percentile [us] (None if empty)"""
+        counts = list(self.counts)
+        total = sum(counts)
+        if not total:
+            return None
+        seen = 0
+        for i, n in enumerate(counts):
+            seen += n
+            if seen >= p / 100 * total:
+                return self.BINS[i] if i < len(self.BINS) else self.stats[2]
+        return self.stats[2]
+
+    def cumulative(self):
+        """(upper bounds, cumulative counts, sum [us]) - the last bound is +Inf"""
+        counts, seen = [], 0
+        for n in list(self.counts):
+            seen += n
+            counts.append(seen)
+        return self.BINS + (float('inf'),), counts, self.stats[1]
+
+    def snapshot(self):
+        steps, total, worst = list(self.stats)
+        edges = [f"<={b}" for b in self.BINS] + [f">{self.BINS[-1]}"]
+        return {
+            'steps': int(steps),
+            'mean_us': total / steps if steps else 0.0,
+            'max_us': worst,
+            'p50_us': self.percentile(50),
+            'p99_us': self.percentile(99),
+            'bins': dict(zip(edges, list(self.counts))),
+        }
@@ -0,0 +1,81 @@
+# waveform.py
+#
+# Move compiler for the Stepper workers.
+#
+# A move is fully determined by its step count, direction, timing profile
+# and the coil phase it starts from, so everything the worker needs can be
+# worked out once up front:
+#
+#   nibbles - the 4-bit coil pattern to output for each step (bytes)
+#   times   - when each step is due, relative to the start of the move [s],
+#             plus one final entry for the end of the move (array of doubles)
+#
+# compile_paced() spreads a shorter move over the step times of a longer
+# one (Bresenham interleaving), so two axes started together also arrive
+# together, and their coinciding steps can go out in the same frame.
+#
+# The worker then only plays the arrays back.  Compiled moves are kept in an
+# LRU cache, so repeated moves (jog chunks, the same slew between targets)
+# cost a dictionary lookup to prepare.
+from array import array
+from functools import lru_cache
+
+SEQ = (0b0001, 0b0011, 0b0010, 0b0110, 0b0100, 0b1100, 0b1000, 0b1001)   # Stepper.seq
+
+
+class CompiledMove:
+    __slots__ = ('steps', 'direction', 'nibbles', 'times', 'end_phase')
+
+    def __init__(self, steps, direction, nibbles, times, end_phase):
+        self.steps = steps
+        self.direction = direction
+        self.nibbles = nibbles
+        self.times = times
+        self.end_phase = end_phase
+
+    @property
+    def duration(self):
+        return self.times[-1]
+
+    def __repr__(self):
+        return f"<CompiledMove {self.direction * self.steps:+d} steps, {self.duration:.3f} s>"
+
+
+@lru_cache(maxsize=128)
+def compile_move(steps, direction, profile, phase):
+    """
+    Compile steps (>= 0) in direction (+1/-1) with a profiles.Profile,
+    starting from coil phase (index into SEQ).  Cached; treat the result
+    as read-only.
+    """
+    times = array('d', [0.0])
+    t = 0.0
+    for d in profile.delays(steps):
+        t += d / 1e6
+        times.append(t)
+    return CompiledMove(steps, direction, _nibbles(steps, direction, phase), times,
+                        (phase + direction * steps) % 8)
+
+
+@lru_cache(maxsize=128)
+def compile_paced(steps, direction, profile, phase, pace_steps):
+    """
+    Like compile_move, but the steps are spread over the step times of a
+    pace_steps (>= steps) move with the same profile: step k goes out with
+    step (k+1)*pace_steps//steps - 1 of it, and the move ends with it.
+    """
+    paced = compile_move(pace_steps, direction, profile, phase).times
+    times = array('d', (paced[(k + 1) * pace_steps // steps - 1] for k in range(steps)))
+    times.append(paced[-1])
+    return CompiledMove(steps, direction, _nibbles(steps, direction, phase), times,
+                        (phase + direction * steps) % 8)
+
+
+def _nibbles(steps, direction, phase):
+    return bytes(SEQ[(phase + direction * (k + 1)) % 8] for k in range(steps))
+
+
+def compile_rotation(delta, profile, phase, steps_per_degree):
+    """Compile a relative move of delta degrees (rounded down to whole steps)"""
+    steps = int(steps_per_degree * abs(delta))
+    return compile_move(steps, 1 if delta > 0 else -1, profile, phase)
@@ -0,0 +1,88 @@
+"""
+VLSampler against FakeVL53L0X: ring buffer, median/EMA filtering,
+latest()/stream() and I2C error recovery.
+
+    python3 -m pytest -q test_vl_sampler.py
+"""
+import statistics
+import threading
+import time
+
+import pytest
+
+from vl_sampler import VLSampler, FakeVL53L0X
+
+BUDGET = 2000   # us per reading: fast enough for the tests
+
+
+def run_until(sampler, count, timeout=5.0):
+    sampler.start()
+    end = time.monotonic() + timeout
+    while sampler.count < count:
+        assert time.monotonic() < end, f"only {sampler.count} samples"
+        time.sleep(0.005)
+    sampler.stop()
+
+
+def test_ring_wraps_around():
+    sampler = VLSampler(FakeVL53L0X(seed=1), size=8, timing_budget=BUDGET)
+    assert sampler.latest() is None
+    assert sampler.samples() == []
+    run_until(sampler, 30)
+    n = sampler.count
+    samples = sampler.samples()
+    assert [s.seq for s in samples] == list(range(n - 8, n))
+    assert [s.seq for s in sampler.samples(n - 3)] == [n - 3, n - 2, n - 1]
+    assert sampler.latest() is samples[-1]
+    assert all(a.t < b.t for a, b in zip(samples, samples[1:]))
+
+
+def test_median_and_ema():
+    sensor = FakeVL53L0X(sway=0.0, noise=2.0, spikes=0.1, seed=3)
+    sampler = VLSampler(sensor, window=5, alpha=0.3, timing_budget=BUDGET)
+    run_until(sampler, 200)
+    samples = sampler.samples()
+    assert samples[0].seq == 0          # nothing overwritten: the whole history
+    raw = [s.mm for s in samples]
+    assert 8190 in raw
+    ema = None
+    for k, s in enumerate(samples):
+        assert s.median == statistics.median(raw[max(0, k - 4):k + 1])
+        ema = s.median if ema is None else ema + 0.3 * (s.median - ema)
+        assert s.ema == pytest.approx(ema)
+    # Spikes only get through the median when they are the majority of a window
+    for k in range(4, len(samples)):
+        if raw[k - 4:k + 1].count(8190) < 3:
+            assert abs(samples[k].median - sensor.distance) < 10
+
+
+def test_stream_yields_every_sample_until_stopped():
+    sampler = VLSampler(FakeVL53L0X(seed=4), timing_budget=BUDGET)
+    sampler.start()
+    seen = []
+    def consume():
+        for s in sampler.stream(timeout=2.0):
+            seen.append(s)
+    reader = threading.Thread(target=consume)
+    reader.start()
+    time.sleep(0.2)
+    sampler.stop()
+    reader.join(1.0)
+    assert not reader.is_alive(), "stream() kept waiting after stop()"
+    assert len(seen) > 10
+    seqs = [s.seq for s in seen]
+    assert seqs == list(range(seqs[0], seqs[0] + len(seqs)))
+    assert seen[-1] is sampler.latest()
+
+
+def test_counts_i2c_errors_and_recovers():
+    sensor = FakeVL53L0X(errors=1.0, seed=5)
+    sampler = VLSampler(sensor, timing_budget=BUDGET)
+    sampler.start()
+    time.sleep(0.1)
+    assert sampler.count == 0
+    assert sampler.errors > 0
+    sensor.errors = 0.2                 # the bus comes back, still flaky
+    run_until(sampler, 50)
+    assert sampler.errors + sampler.count == sensor.reads
+    assert sampler.latest().seq == sampler.count - 1
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# vl_sampler.py
+#
+# Background sampler for the VL53L0X distance sensor.
+#
+# A thread keeps the sensor in continuous mode and reads it as fast as the
+# measurement timing budget allows (20 ms budget -> ~50 Hz), so other code
+# never waits on I2C.  Every reading goes into a fixed-size ring buffer as
+# a timestamped Sample with a running median (drops the odd spike the
+# sensor gives on edges) and an exponential moving average of that median.
+#
+#   sampler = VLSampler(adafruit_vl53l0x.VL53L0X(board.I2C()))
+#   sampler.start()
+#   sampler.latest()            # newest Sample or None, never blocks
+#   for s in sampler.stream():  # every new Sample as it arrives
+#       ...
+#
+# FakeVL53L0X stands in for the sensor off the Pi (python3 vl_sampler.py
+# runs against it).
+import math
+import random
+import statistics
+import threading
+import time
+from collections import deque, namedtuple
+
+# t: time.monotonic() of the reading; mm: raw range; median/ema: filtered [mm]
+Sample = namedtuple('Sample', 'seq t mm median ema')
+
+
+class VLSampler:
+    def __init__(self, sensor, size=512, window=5, alpha=0.3, timing_budget=20000):
+        self.sensor = sensor
+        self.size = size                   # samples kept
+        self.window = window               # readings in the running median
+        self.alpha = alpha                 # EMA weight of the newest median
+        self.timing_budget = timing_budget # per measurement [us]; 20000 is the sensor's minimum
+        self.buffer = [None] * size
+        self.count = 0                     # samples taken so far
+        self.errors = 0                    # failed reads (I2C errors)
+        self.cond = threading.Condition()
+        self._recent = deque(maxlen=window)
+        self._ema = None
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.sensor.measurement_timing_budget = self.timing_budget
+        self.sensor.start_continuous()
+        self._running = True
+        self._thread = threading.Thread(target=self.__run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+        self.sensor.stop_continuous()
+        with self.cond:
+            self.cond.notify_all()         # let stream() readers finish
+
+    def latest(self):
+        """Newest sample, or None before the first one"""
+        n = self.count
+        return self.buffer[(n - 1) % self.size] if n else None
+
+    def samples(self, since=0):
+        """Samples with seq >= since still in the buffer, oldest first"""
+        with self.cond:
+            n = self.count
+            first = max(since, n - self.size, 0)
+            return [self.buffer[i % self.size] for i in range(first, n)]
+
+    def stream(self, timeout=None):
+        """Yield every new sample as it arrives (until stop() or timeout)"""
+        seen = self.count
+        while True:
+            with self.cond:
+                if not self.cond.wait_for(lambda: self.count > seen or not self._running, timeout):
+                    return
+                if self.count <= seen:
+                    return                 # stopped
+            new = self.samples(seen)
+            seen = new[-1].seq + 1 if new else self.count
+            yield from new
+
+    def rate(self):
+        """Recent sample rate [Hz]"""
+        recent = self.samples(self.count - 50)
+        if len(recent) < 2:
+            return 0.0
+        return (len(recent) - 1) / (recent[-1].t - recent[0].t)
+
+    def __run(self):
+        while self._running:
+            try:
+                mm = self.sensor.range     # continuous mode: waits for the next result
+            except OSError:
+                self.errors += 1
+                time.sleep(self.timing_budget / 1e6)
+                continue
+            t = time.monotonic()
+            self._recent.append(mm)
+            median = statistics.median(self._recent)
+            self._ema = median if self._ema is None else self._ema + self.alpha * (median - self._ema)
+            with self.cond:
+                self.buffer[self.count % self.size] = Sample(self.count, t, mm, median, self._ema)
+                self.count += 1
+                self.cond.notify_all()
+
+
+class FakeVL53L0X:
+    """
+    Software VL53L0X: same attributes as adafruit_vl53l0x.VL53L0X as used
+    here.  A range read takes one timing budget and returns a target
+    swaying around `distance` mm with some noise, plus an occasional
+    out-of-range spike (8190) like the real sensor gives.
+    """
+
+    def __init__(self, distance=500.0, sway=50.0, noise=3.0, spikes=0.02, errors=0.0, seed=None):
+        self.distance = distance
+        self.sway = sway
+        self.noise = noise
+        self.spikes = spikes               # fraction of readings that are 8190
+        self.errors = errors               # fraction of reads raising OSError
+        self.measurement_timing_budget = 33000
+        self.continuous = False
+        self.reads = 0
+        self._rng = random.Random(seed)
+        self._due = None
+
+    def start_continuous(self):
+        self.continuous = True
+        self._due = time.monotonic()
+
+    def stop_continuous(self):
+        self.continuous = False
+
+    @property
+    def range(self):
+        budget = self.measurement_timing_budget / 1e6
+        if self.continuous:
+            self._due = max(self._due + budget, time.monotonic())
+            time.sleep(max(0.0, self._due - time.monotonic()))
+        else:
+            time.sleep(budget + 0.001)     # single shot: start, wait, read
+        self.reads += 1
+        if self._rng.random() < self.errors:
+            raise OSError(121, 'Remote I/O error')
+        if self._rng.random() < self.spikes:
+            return 8190
+        value = self.distance + self.sway * math.sin(time.monotonic()) + self._rng.gauss(0, self.noise)
+        return int(max(0, value))
+
+
+if __name__ == '__main__':
+    sensor = FakeVL53L0X(seed=1)
+    sampler = VLSampler(sensor)
+    sampler.start()
+    end = time.monotonic() + 2.0
+    for s in sampler.stream(timeout=1.0):
+        print(f"\r#{s.seq:4d} raw {s.mm:5d} mm  median {s.median:7.1f} mm  ema {s.ema:7.1f} mm", end='', flush=True)
+        if s.t > end:
+            break
+    print(f"\n{sampler.count} samples at {sampler.rate():.1f} Hz "
+          f"(timing budget {sampler.timing_budget / 1000:.0f} ms), {sampler.errors} read errors")
+    # Error against the fake's noise-free distance at each reading
+    true = lambda s: sensor.distance + sensor.sway * math.sin(s.t)
+    samples = sampler.samples()
+    raw = max(abs(s.mm - true(s)) for s in samples)
+    median = max(abs(s.median - true(s)) for s in samples)
+    print(f"{sum(s.mm == 8190 for s in samples)} out-of-range spikes; worst error raw {raw:.0f} mm, "
+          f"median {median:.0f} mm")
+    sampler.stop()